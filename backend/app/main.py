@@ -1,11 +1,53 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import item_router, trip_router, user_router
+from app.tracing import ServerTimingMiddleware
+from app.weighing import shutdown_weighing_executor
+from computer_vision.batching import get_batcher, stop_batcher
+from computer_vision.config import (
+    CV_EXECUTION_MODE,
+    CV_MICRO_BATCHING,
+    CV_MODEL_TIERS,
+    CV_PRELOAD_MODEL,
+    CV_TRACE_HEADERS,
+)
+from computer_vision.debug_images import stop_debug_writer
+from computer_vision.executor import shutdown_executor
+from computer_vision.registry import load_model
+from computer_vision.workers import get_process_pool, shutdown_process_pool
+from hardware.readscale import SCALE_READER, start_scale_readers, stop_scale_reader
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CV_EXECUTION_MODE == "process":
+        # Each worker process loads its own model; the API process only does I/O
+        get_process_pool().warm_up()
+    elif CV_PRELOAD_MODEL:
+        # Load the YOLO models once at startup instead of on every request
+        for weights in CV_MODEL_TIERS:
+            load_model(weights)
+    if CV_MICRO_BATCHING:
+        get_batcher().start()
+    if SCALE_READER:
+        # open the scales now so the first weighing doesn't wait for them
+        start_scale_readers()
+    yield
+    stop_scale_reader()
+    shutdown_weighing_executor()
+    stop_batcher()
+    stop_debug_writer()
+    shutdown_executor()
+    shutdown_process_pool()
+
 
 app = FastAPI(
     title="Travel Packer API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -21,6 +63,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if CV_TRACE_HEADERS:
+    app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(user_router, prefix="/users", tags=["users"])
 app.include_router(trip_router, prefix="/trips", tags=["trips"])
 app.include_router(item_router, prefix="/items", tags=["items"])
@@ -32,6 +32,8 @@ class CVResult(BaseModel):
     confidence_score: float = Field(..., ge=0.0, le=1.0)
     bounding_boxes: List[BoundingBox]
     dimensions: Dimensions
+    # weights of the model tier that produced this result, e.g. "yolov8n.pt"
+    model: Optional[str] = None
 
 class Item(BaseModel):
     item_id: str = Field(default_factory=lambda: str(uuid4()))
@@ -41,6 +43,20 @@ class Item(BaseModel):
     cv_result: Optional[CVResult] = None
     trips: List[str] = Field(default_factory=list, description="Trip IDs")
 
+class WeighingJobStatus(str, Enum):
+    queued='queued'
+    running='running'
+    done='done'
+    failed='failed'
+
+class WeighingJob(BaseModel):
+    job_id: str = Field(default_factory=lambda: str(uuid4()))
+    status: WeighingJobStatus = WeighingJobStatus.queued
+    item_id: Optional[str] = None
+    station: Optional[str] = None
+    item: Optional[Item] = None
+    error: Optional[str] = None
+
 class ItemUpdate(BaseModel):
     item_importance: Optional[int] = 0
     weight_kg: Optional[float] = None
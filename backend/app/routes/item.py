@@ -1,14 +1,61 @@
+import asyncio
 import json
-from typing import List, Optional
-
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile
-
-from app.models import CVResult, Item, ItemUpdate
-from app.state.db import items_store, trips_store
-from computer_vision.cv import detect_objects_yolo
-from app.models import Item, ItemUpdate
-from app.state.db import items_store, trips_store
-from hardware.readscale import get_weight
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, List, Optional
+
+from fastapi import (
+    APIRouter,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+    WebSocket,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.models import CVResult, Item, ItemUpdate, WeighingJob, WeighingJobStatus
+from app.state.db import items_store, trips_store, weighing_jobs_store
+from app.uploads import image_upload
+from app.weighing import (
+    WeighingOverloaded,
+    submit_job,
+    wait_for_job,
+    weighing_stats,
+)
+from computer_vision.batching import get_batcher
+from computer_vision.cache import get_detection_cache
+from computer_vision.calibration import calibration_store
+from computer_vision.config import (
+    CV_DEBUG_IMAGES,
+    CV_EXECUTION_MODE,
+    CV_MAX_BATCH_IMAGES,
+    CV_MICRO_BATCHING,
+    CV_STREAM_MAX_FRAME_BYTES,
+)
+from computer_vision.cv import (
+    debug_test_image,
+    detect_objects_yolo,
+    detect_objects_yolo_batch,
+)
+from computer_vision.debug_images import get_debug_writer
+from computer_vision.executor import run_in_cv_pool
+from computer_vision.metrics import resolution_stats, stage_stats
+from computer_vision.tiering import DetectionOverloaded, model_tiers
+from computer_vision.tracking import FrameTracker, frame_thumbnail
+from computer_vision.workers import get_process_pool
+from hardware.readscale import (
+    SCALE_READER,
+    Reading,
+    StabilityDetector,
+    UnknownStation,
+    get_scale_reader,
+    get_weight,
+    iter_readings,
+    open_scale,
+    scale_pool,
+    scale_reader_stats,
+)
 from app.routes.trip import recalculate_trip_totals
 
 router = APIRouter()
@@ -98,13 +145,34 @@ def delete_item(item_id: str):
     return {"message": "Item deleted successfully"}
 
 
-@router.post("/weight", response_model=Item)
-def read_weight(
-    item_id: Optional[str] = Query(None)
-):
-    """Read weight from the scale and optionally associate with item."""
-
-    result = get_weight(wait_time=6.0)
+def resolve_station(station: Optional[str]) -> Optional[str]:
+    """The plugged-in station a request is for (see ScalePool.resolve); 404 if
+    `station` isn't one, so no reader or lock is made for it."""
+    try:
+        return scale_pool.resolve(station)
+    except UnknownStation:
+        raise HTTPException(status_code=404, detail=f"Unknown scale station: {station}")
+
+
+def measure_weight(station: Optional[str] = None) -> float:
+    """Read a settled weight in kg from a station's scale."""
+    # no station means the default scale, which shares that station's lock
+    station = resolve_station(station)
+    if SCALE_READER:
+        # the reader already has the scale open, so this returns as soon as
+        # there's a recent stable reading
+        reader = get_scale_reader(station)
+        if reader is None:
+            raise HTTPException(status_code=500, detail="Scale not detected")
+        weight_kg = reader.wait_for_weight(timeout=6.0)
+        if weight_kg is None:
+            error = "No valid readings" if reader.connected else "Scale not detected"
+            raise HTTPException(status_code=500, detail=error)
+        return weight_kg
+
+    # one weighing per scale at a time, other stations aren't held up
+    with scale_pool.lock(station):
+        result = get_weight(wait_time=6.0, station_id=station)
     result_dict = json.loads(result)
 
     if "error" in result_dict:
@@ -113,7 +181,82 @@ def read_weight(
     weight_kg = result_dict.get("total_weight_kg")
     if weight_kg is None:
         raise HTTPException(status_code=500, detail="Failed to get weight reading")
+    return weight_kg
+
+
+def run_weighing_job(job: WeighingJob) -> None:
+    """Weighing pool side: read the scale and record the outcome on the job."""
+    job.status = WeighingJobStatus.running
+    try:
+        weight_kg = measure_weight(job.station)
+        job.item = store_weight(weight_kg, job.item_id)
+        job.status = WeighingJobStatus.done
+    except HTTPException as e:
+        job.error = e.detail
+        job.status = WeighingJobStatus.failed
+    except Exception as e:
+        job.error = repr(e)
+        job.status = WeighingJobStatus.failed
+
+
+def start_weighing(item_id: Optional[str], station: Optional[str]) -> WeighingJob:
+    try:
+        return submit_job(
+            WeighingJob(item_id=item_id, station=station), run_weighing_job
+        )
+    except WeighingOverloaded as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+
+
+@router.post("/weight", response_model=Item)
+async def read_weight(
+    item_id: Optional[str] = Query(None),
+    station: Optional[str] = Query(None),
+):
+    """Read weight from the scale and optionally associate with item.
+
+    `station` picks the scale when several are plugged in (see
+    GET /items/weight/stations); without it the first scale found is used.
+    Runs as a weighing job and waits for it, see POST /items/weight/jobs.
+    """
+    if station is not None:
+        await run_in_threadpool(resolve_station, station)
+    job = await wait_for_job(start_weighing(item_id, station).job_id)
+    if job.status == WeighingJobStatus.failed:
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.item
+
+
+@router.post("/weight/jobs", response_model=WeighingJob, status_code=202)
+def create_weighing_job(
+    item_id: Optional[str] = Query(None),
+    station: Optional[str] = Query(None),
+):
+    """Start weighing in the background and return the job right away.
+
+    Poll GET /items/weight/jobs/{job_id} for the result. Returns 503 when
+    too many weighings are already pending, 404 for an unknown station.
+    """
+    if station is not None:
+        resolve_station(station)
+    return start_weighing(item_id, station)
+
+
+@router.get("/weight/jobs/{job_id}", response_model=WeighingJob)
+async def get_weighing_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """Get a weighing job; with `wait`, hold the request up to that many
+    seconds for it to finish (long polling)."""
+    # the job can also be pruned while we wait for it
+    job = await wait_for_job(job_id, timeout=wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Weighing job not found")
+    return job
+
 
+def store_weight(weight_kg: float, item_id: Optional[str] = None) -> Item:
+    """Set the weight on an existing item, or create a new item with it."""
     # create/update an item
     if item_id and item_id in items_store:
         item = items_store[item_id]
@@ -128,28 +271,184 @@ def read_weight(
     return item
 
 
+def server_sent_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def weight_events(readings: Iterator[Reading], item_id: Optional[str]) -> Iterator[str]:
+    """SSE stream of scale readings, ending with the settled weight."""
+    detector = StabilityDetector()
+    try:
+        for reading in readings:
+            yield server_sent_event(
+                "reading", {"grams": reading.grams, "stable": reading.stable}
+            )
+            if detector.add(reading.grams, reading.stable):
+                item = store_weight(round(detector.grams / 1000, 3), item_id)
+                yield server_sent_event(
+                    "settled",
+                    {"weight_kg": item.weight_kg, "item": item.model_dump(mode="json")},
+                )
+                return
+        yield server_sent_event("timeout", {"detail": "Weight did not settle"})
+    finally:
+        # stop reading (and release the device) if the client goes away
+        readings.close()
+
+
+@router.get("/weight/stream")
+def stream_weight(
+    item_id: Optional[str] = Query(None),
+    station: Optional[str] = Query(None),
+    timeout: float = Query(6.0, gt=0, le=60),
+):
+    """Stream live scale readings as server-sent events.
+
+    Sends a "reading" event for every report from the scale. Once the weight
+    settles it's stored like POST /items/weight does and a final "settled"
+    event carries the updated item; if it doesn't settle within `timeout`
+    seconds the stream ends with a "timeout" event instead.
+    """
+    station = resolve_station(station)
+    if station is None:
+        raise HTTPException(status_code=500, detail="Scale not detected")
+    if SCALE_READER:
+        readings = get_scale_reader(station).follow(timeout)
+    else:
+
+        def open_readings():
+            # configured under the station lock, like get_weight
+            dev = open_scale(station)
+            return iter_readings(dev, timeout) if dev is not None else None
+
+        readings = scale_pool.locked(station, open_readings)
+
+    return StreamingResponse(
+        weight_events(readings, item_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get("/weight/stations")
+def list_weight_stations():
+    """List the station IDs of the scales plugged into this server."""
+    return {"stations": scale_pool.stations()}
+
+
+@router.get("/weight/stats")
+def get_weight_stats():
+    """Report each background scale reader's connection and packet counts."""
+    return {
+        "readers": scale_reader_stats() if SCALE_READER else None,
+        "jobs": weighing_stats(),
+    }
+
+
+
+async def run_detection(
+    image_bytes: bytes, station_id: Optional[str] = None
+) -> List[CVResult]:
+    """Run detection on one image, counting it towards the load that picks the model tier.
+
+    Raises a 503 if load shedding is on and too many detections are in flight.
+    """
+    if CV_DEBUG_IMAGES:
+        debug_test_image(image_bytes)
+
+    with tracked_detection():
+        return await dispatch_detection(image_bytes, station_id)
+
+
+@contextmanager
+def tracked_detection(count: int = 1) -> Iterator[None]:
+    """Count `count` detections (a batch counts each image) towards the load
+    that picks the model tier, turning load shedding into a 503."""
+    try:
+        with model_tiers.track(count):
+            yield
+    except DetectionOverloaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many detections in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def dispatch_detection(
+    image_bytes: bytes, station_id: Optional[str] = None
+) -> List[CVResult]:
+    """Run detection on one image using the configured execution mode."""
+    if CV_MICRO_BATCHING:
+        # share a model call with other requests arriving at the same time
+        future = get_batcher().submit(image_bytes, station_id)
+        return await asyncio.wrap_future(future)
+
+    if CV_EXECUTION_MODE == "process":
+        # decode here, run the model in a worker process; the wait for the
+        # worker doesn't hold a CV pool thread
+        return await get_process_pool().detect_async(image_bytes, station_id)
+
+    # inference is CPU-bound, keep it off the event loop
+    return await run_in_cv_pool(detect_objects_yolo, image_bytes, station_id)
+
+
+@router.get("/detect/stats")
+def get_detection_stats():
+    """Report queue, batching and cache statistics for the CV pipeline."""
+    cache = get_detection_cache()
+    return {
+        "micro_batching": get_batcher().stats() if CV_MICRO_BATCHING else None,
+        "cache": cache.stats() if cache else None,
+        "resolution": resolution_stats(),
+        "stages": stage_stats(),
+        "tiers": model_tiers.stats(),
+        "calibration": calibration_store.stats(),
+        "debug_images": get_debug_writer().stats() if CV_DEBUG_IMAGES else None,
+    }
+
+
+@router.get("/detect/calibration/{station_id}")
+def get_station_calibration(station_id: str):
+    """Get the stored marker calibration for a packing station."""
+    calibration = calibration_store.get(station_id)
+    if calibration is None:
+        raise HTTPException(status_code=404, detail="Station not calibrated")
+
+    return {
+        "station_id": station_id,
+        "px_per_cm": calibration.px_per_cm,
+        "frames_since_check": calibration.frames_since_check,
+    }
+
+
+@router.delete("/detect/calibration/{station_id}")
+def reset_station_calibration(station_id: str):
+    """Forget a station's calibration, e.g. after the camera or marker moved."""
+    if not calibration_store.reset(station_id):
+        raise HTTPException(status_code=404, detail="Station not calibrated")
+    return {"message": "Calibration reset successfully"}
+
 
 @router.post("/detect", response_model=Item)
 async def detect_item_from_image(
     image: UploadFile = File(...),
-    item_id: Optional[str] = Query(None)
+    item_id: Optional[str] = Query(None),
+    station_id: Optional[str] = Query(None),
 ):
-    """Run YOLO detection, and create an item."""
+    """Run YOLO detection, and create an item.
 
-    image_bytes = await image.read()
-    cv_results = detect_objects_yolo(image_bytes)
+    Pass a station_id from a fixed packing station to reuse its marker calibration.
+    """
+
+    with image_upload(image) as image_bytes:
+        cv_results = await run_detection(image_bytes, station_id)
     if not cv_results:
         raise HTTPException(status_code=500, detail="Invalid YOLO output")
     
     # assuming cv_results only ever returns result of one item
     cv_result = cv_results[0]
-    
-    volume = 0
-    
-    # calculate volume for item
-    if cv_result.dimensions:
-        h = cv_result.dimensions.height or 1
-        volume = cv_result.dimensions.length * cv_result.dimensions.width * h
+    volume = estimate_volume(cv_result)
 
     if item_id and item_id in items_store:
         item = items_store[item_id]
@@ -163,3 +462,174 @@ async def detect_item_from_image(
         items_store[item.item_id] = item
 
     return item
+
+
+@router.post("/detect/all", response_model=List[Item])
+async def detect_all_items_from_image(
+    image: UploadFile = File(...),
+    trip_id: Optional[str] = Query(None),
+    station_id: Optional[str] = Query(None),
+):
+    """Run YOLO detection once, and create an item for every detected object.
+
+    If a trip_id is given, every new item is added to the trip and the trip
+    totals are recalculated once at the end.
+    """
+    if trip_id and trip_id not in trips_store:
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+    with image_upload(image) as image_bytes:
+        cv_results = await run_detection(image_bytes, station_id)
+    if not cv_results:
+        raise HTTPException(status_code=500, detail="Invalid YOLO output")
+
+    items = []
+    for cv_result in cv_results:
+        volume = estimate_volume(cv_result)
+        item = Item(cv_result=cv_result, estimated_volume_cm3=volume)
+        items_store[item.item_id] = item
+        items.append(item)
+
+    if trip_id:
+        trip = trips_store[trip_id]
+        for item in items:
+            trip.items.append(item.item_id)
+            item.trips.append(trip_id)
+        recalculate_trip_totals(trip_id)
+
+    return items
+
+
+@router.post("/detect/batch", response_model=List[Item])
+async def detect_items_from_images(
+    images: List[UploadFile] = File(...),
+    station_id: Optional[str] = Query(None),
+):
+    """Run YOLO detection on many images in one batch, and create an item per image."""
+
+    if len(images) > CV_MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images (max {CV_MAX_BATCH_IMAGES} per batch)",
+        )
+
+    with ExitStack() as uploads:
+        images_bytes = [uploads.enter_context(image_upload(image)) for image in images]
+        station_ids = [station_id] * len(images_bytes)
+        with tracked_detection(len(images_bytes)):
+            batch_results = await run_in_cv_pool(
+                detect_objects_yolo_batch, images_bytes, station_ids
+            )
+
+    items = []
+    for cv_results in batch_results:
+        # images with nothing detected are skipped
+        if not cv_results:
+            continue
+
+        cv_result = cv_results[0]
+        volume = estimate_volume(cv_result)
+        item = Item(cv_result=cv_result, estimated_volume_cm3=volume)
+        items_store[item.item_id] = item
+        items.append(item)
+
+    if not items:
+        raise HTTPException(status_code=500, detail="Invalid YOLO output")
+
+    return items
+
+
+@router.websocket("/detect/stream")
+async def detect_items_from_stream(
+    websocket: WebSocket,
+    trip_id: Optional[str] = Query(None),
+    station_id: Optional[str] = Query(None),
+):
+    """Detect items in a stream of camera frames, e.g. a short video of a bag.
+
+    Send each frame as a binary JPEG/PNG message, then the text message "end".
+    YOLO only runs on keyframes (see FrameTracker). An "item" event is sent as
+    soon as each object is confirmed, and a "done" event closes the stream.
+    """
+    if trip_id and trip_id not in trips_store:
+        await websocket.close(code=1008, reason="Trip not found")
+        return
+
+    await websocket.accept()
+    tracker = FrameTracker()
+    items = []
+    disconnected = False
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                disconnected = True
+                break
+            frame = message.get("bytes")
+            if frame is None:
+                if message.get("text") == "end":
+                    break
+                continue
+
+            if len(frame) > CV_STREAM_MAX_FRAME_BYTES:
+                await websocket.send_json(
+                    {"event": "error", "detail": "Frame too large"}
+                )
+                continue
+
+            thumbnail = await run_in_cv_pool(frame_thumbnail, frame)
+            if not tracker.needs_inference(thumbnail):
+                continue
+
+            try:
+                cv_results = await run_detection(frame, station_id)
+            except HTTPException as e:
+                # shed under load: skip this keyframe, the next one retries
+                await websocket.send_json({"event": "error", "detail": e.detail})
+                continue
+            for track in tracker.update(cv_results, thumbnail):
+                cv_result = track.cv_result
+                volume = estimate_volume(cv_result)
+                item = Item(cv_result=cv_result, estimated_volume_cm3=volume)
+                items_store[item.item_id] = item
+                items.append(item)
+
+                if trip_id:
+                    trips_store[trip_id].items.append(item.item_id)
+                    item.trips.append(trip_id)
+
+                await websocket.send_json(
+                    {
+                        "event": "item",
+                        "frame": tracker.frames,
+                        "track_id": track.track_id,
+                        "item": item.model_dump(mode="json"),
+                    }
+                )
+    finally:
+        # items already confirmed are kept even if the client goes away
+        if trip_id and items:
+            recalculate_trip_totals(trip_id)
+
+    if disconnected:
+        return
+
+    await websocket.send_json(
+        {
+            "event": "done",
+            "frames": tracker.frames,
+            "keyframes": tracker.keyframes,
+            "items": len(items),
+        }
+    )
+    await websocket.close()
+
+
+def estimate_volume(cv_result: CVResult) -> float:
+    """Calculate volume for an item from its detected dimensions."""
+    if not cv_result.dimensions:
+        return 0
+
+    h = cv_result.dimensions.height or 1
+    return cv_result.dimensions.length * cv_result.dimensions.width * h
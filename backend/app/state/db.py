@@ -1,6 +1,7 @@
 from typing import Dict
-from app.models import Trip, Item, User
+from app.models import Trip, Item, User, WeighingJob
 
 trips_store: Dict[str, Trip] = {}
 items_store: Dict[str, Item] = {}
 users_store: Dict[str, User] = {}
+weighing_jobs_store: Dict[str, WeighingJob] = {}
@@ -0,0 +1,32 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from computer_vision.metrics import collect_spans, server_timing
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with the CV stages each request went through.
+
+    Browser dev tools show the header as a timeline, e.g.
+    `Server-Timing: upload;dur=0.05, decode;dur=21.30, inference;dur=84.12`.
+    Stages run by the micro-batcher are shared between requests and aren't
+    included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_spans() as spans:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start" and spans:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(spans))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
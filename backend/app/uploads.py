@@ -0,0 +1,80 @@
+import io
+import mmap
+from contextlib import contextmanager
+from tempfile import SpooledTemporaryFile
+from typing import Iterator
+
+from fastapi import HTTPException, UploadFile
+
+from computer_vision.config import CV_MAX_UPLOAD_BYTES
+from computer_vision.decode import sniff_image_format
+from computer_vision.metrics import timed
+
+
+@contextmanager
+def image_upload(
+    upload: UploadFile, max_bytes: int = CV_MAX_UPLOAD_BYTES
+) -> Iterator[memoryview]:
+    """Validate an uploaded image and expose its bytes without copying them.
+
+    Starlette has already spooled the upload: small files stay in memory,
+    anything over 1MB is rolled to a temporary file on disk. Instead of
+    `await upload.read()`, which copies the whole body onto the heap, this
+    checks the size and the JPEG/PNG magic bytes first, then hands out a
+    memoryview: over an mmap of the temporary file for big uploads, over the
+    in-memory bytes for small ones. The view is released when the `with`
+    block exits, so callers must be done with it by then.
+
+    Raises 413 if the file is bigger than `max_bytes`, 415 if it isn't a
+    JPEG or PNG and 400 if it's empty.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Image too large (max {max_bytes} bytes)"
+        )
+
+    with timed("upload"):
+        file = upload.file
+        mapped = None
+        if isinstance(file, io.BytesIO):
+            buffer = file.getbuffer()
+        elif isinstance(file, SpooledTemporaryFile) and not getattr(
+            file, "_rolled", True
+        ):
+            # still in memory, so at most the 1MB spool size: a copy is cheap.
+            # There's no public way to ask, so this relies on CPython's private
+            # _rolled flag; without it we fall back to fileno(), which rolls
+            # the file over to disk first
+            file.seek(0)
+            buffer = memoryview(file.read())
+        else:
+            # on disk: map it, pages are read lazily by the decoder
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses empty files
+                raise HTTPException(status_code=400, detail="Empty image upload")
+            buffer = memoryview(mapped)
+
+    try:
+        if len(buffer) == 0:
+            raise HTTPException(status_code=400, detail="Empty image upload")
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"Image too large (max {max_bytes} bytes)"
+            )
+        if sniff_image_format(buffer) is None:
+            raise HTTPException(
+                status_code=415, detail="Unsupported image type (expected JPEG or PNG)"
+            )
+        yield buffer
+    finally:
+        try:
+            buffer.release()
+            if mapped is not None:
+                mapped.close()
+        except BufferError:
+            # still being decoded on a CV pool thread or in the micro-batcher
+            # after the request was cancelled; the view and mapping are freed
+            # once that decode drops its reference
+            pass
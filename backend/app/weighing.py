@@ -0,0 +1,107 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from app.models import WeighingJob
+from app.state.db import weighing_jobs_store
+
+# Weighings run as jobs on their own pool, so a slow scale read never ties up
+# the threads that serve the other routes. The pool size is how many scales
+# are read at once; past WEIGHING_MAX_PENDING queued or running jobs, new
+# ones are refused.
+WEIGHING_WORKERS = int(os.getenv("WEIGHING_WORKERS", "4"))
+WEIGHING_MAX_PENDING = int(os.getenv("WEIGHING_MAX_PENDING", "32"))
+# Finished jobs kept for status lookups before the oldest are dropped
+WEIGHING_JOBS_KEPT = int(os.getenv("WEIGHING_JOBS_KEPT", "1000"))
+
+
+class WeighingOverloaded(RuntimeError):
+    """Raised when a weighing job is refused because too many are pending."""
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# job_id -> future, for jobs that haven't finished yet
+_futures: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def get_weighing_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WEIGHING_WORKERS, thread_name_prefix="weighing"
+            )
+        return _executor
+
+
+def _forget(job_id: str, future: Future) -> None:
+    with _lock:
+        _futures.pop(job_id, None)
+
+
+def _prune_finished() -> None:
+    """Drop the oldest finished jobs once more than WEIGHING_JOBS_KEPT are stored."""
+    finished = [job_id for job_id in weighing_jobs_store if job_id not in _futures]
+    for job_id in finished[: max(0, len(finished) - WEIGHING_JOBS_KEPT)]:
+        del weighing_jobs_store[job_id]
+
+
+def submit_job(job: WeighingJob, run: Callable[[WeighingJob], None]) -> WeighingJob:
+    """Store `job` and run `run(job)` on the weighing pool.
+
+    `run` is expected to record its outcome on the job itself. Raises
+    WeighingOverloaded if WEIGHING_MAX_PENDING jobs are already pending.
+    """
+    with _lock:
+        if len(_futures) >= WEIGHING_MAX_PENDING:
+            raise WeighingOverloaded(f"{len(_futures)} weighings already pending")
+        _prune_finished()
+        weighing_jobs_store[job.job_id] = job
+        future = get_weighing_executor().submit(run, job)
+        _futures[job.job_id] = future
+    future.add_done_callback(partial(_forget, job.job_id))
+    return job
+
+
+async def wait_for_job(
+    job_id: str, timeout: Optional[float] = None
+) -> Optional[WeighingJob]:
+    """Wait up to `timeout` seconds (forever if None) for a job to finish.
+
+    Returns the job either way; check its status to see whether it's done.
+    None if the job isn't stored (anymore), e.g. pruned while waiting.
+    """
+    with _lock:
+        future = _futures.get(job_id)
+    if future is not None:
+        try:
+            # shield: timing out must not cancel the weighing itself
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return weighing_jobs_store.get(job_id)
+
+
+def weighing_stats() -> dict:
+    with _lock:
+        pending = len(_futures)
+    return {
+        "workers": WEIGHING_WORKERS,
+        "pending": pending,
+        "max_pending": WEIGHING_MAX_PENDING,
+        "stored": len(weighing_jobs_store),
+    }
+
+
+def shutdown_weighing_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
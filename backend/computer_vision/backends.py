@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+from ultralytics import YOLO
+
+from computer_vision.config import CV_BACKEND, CV_INT8
+
+# Inference backends we can run the YOLO weights on. Ultralytics loads all of
+# them behind the same YOLO interface, so results come back in the same shape.
+#   torch:    the stock PyTorch .pt weights
+#   onnx:     exported .onnx run with onnxruntime (INT8 via dynamic quantization)
+#   openvino: exported OpenVINO IR (INT8 via NNCF post-training quantization)
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def exported_path(weights: str, backend: str, int8: bool = False) -> str:
+    """Where the exported model for `weights` lives for a given backend."""
+    stem = Path(weights).with_suffix("")
+    if backend == "torch":
+        return weights
+    if backend == "onnx":
+        return f"{stem}-int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Unknown CV backend: {backend} (expected one of {BACKENDS})")
+
+
+def export_model(weights: str, backend: str, int8: bool = False) -> str:
+    """Export the .pt weights for a backend and return the exported path."""
+    target = exported_path(weights, backend, int8)
+
+    # Exports are traced at 640 but with dynamic axes, so the batch endpoint and
+    # micro-batcher can send N images and the adaptive-resolution tiers
+    # (CV_RESOLUTION_TIERS, e.g. 320) run at their own size
+    if backend == "onnx":
+        onnx_path = YOLO(weights).export(format="onnx", imgsz=640, dynamic=True)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(onnx_path, target, weight_type=QuantType.QUInt8)
+            return target
+        return onnx_path
+
+    if backend == "openvino":
+        return YOLO(weights).export(
+            format="openvino", imgsz=640, dynamic=True, int8=int8
+        )
+
+    return target
+
+
+def resolve_weights(
+    weights: str, backend: str = CV_BACKEND, int8: bool = CV_INT8
+) -> str:
+    """Return the model file to load for a backend, exporting it on first use."""
+    target = exported_path(weights, backend, int8)
+    if backend == "torch" or os.path.exists(target):
+        return target
+
+    print(f"Exporting {weights} for the {backend} backend (int8={int8})...")
+    return export_model(weights, backend, int8)
+
+
+def load_backend_model(
+    weights: str, backend: str = CV_BACKEND, int8: bool = CV_INT8
+) -> YOLO:
+    """Load the YOLO weights on the configured inference backend."""
+    return YOLO(resolve_weights(weights, backend, int8), task="detect")
@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from app.models import CVResult
+from computer_vision.config import CV_BATCH_MAX_SIZE, CV_BATCH_MAX_WAIT_MS
+from computer_vision.cv import detect_objects_yolo_batch
+
+# Sentinel put on the queue to stop the worker thread
+_STOP = object()
+
+
+class MicroBatcher:
+    """Groups concurrent detection requests into batched model calls.
+
+    Requests arriving within `max_wait_ms` of the first one in a batch (up to
+    `max_batch_size`) are run through the model together, and each caller gets
+    its own slice of the results back through a Future.
+    """
+
+    def __init__(
+        self,
+        detect_batch: Callable[
+            [List[bytes], List[Optional[str]]], List[List[CVResult]]
+        ],
+        max_batch_size: int = CV_BATCH_MAX_SIZE,
+        max_wait_ms: float = CV_BATCH_MAX_WAIT_MS,
+    ):
+        self.detect_batch = detect_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max_wait_ms / 1000
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Stats
+        self._batch_sizes: Counter = Counter()
+        self._requests = 0
+        self._max_queue_depth = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="cv-micro-batcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, image_bytes: bytes, station_id: Optional[str] = None) -> Future:
+        """Queue one image; the Future resolves to its list of CVResults."""
+        self.start()
+
+        future: Future = Future()
+        self._queue.put((image_bytes, station_id, future))
+
+        with self._lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            batched_requests = sum(size * n for size, n in self._batch_sizes.items())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": batches,
+                "avg_batch_size": (
+                    round(batched_requests / batches, 2) if batches else 0.0
+                ),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_s * 1000,
+            }
+
+    def _collect_batch(self, first) -> list:
+        """Gather requests until the batch is full or the wait window closes."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                # finish this batch first, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(request)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            # Drop requests whose callers have already given up
+            batch = [
+                request
+                for request in self._collect_batch(first)
+                if request[2].set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            images, station_ids, futures = zip(*batch)
+
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+
+            try:
+                results = self.detect_batch(list(images), list(station_ids))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, cv_results in zip(futures, results):
+                future.set_result(cv_results)
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher:
+    """Return the process-wide batcher around detect_objects_yolo_batch."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(detect_objects_yolo_batch)
+        return _batcher
+
+
+def stop_batcher() -> None:
+    global _batcher
+    with _batcher_lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.stop(timeout=5)
@@ -0,0 +1,440 @@
+"""Benchmarks for the CV pipeline.
+
+Run from the backend folder, ideally on the same kind of box we deploy to:
+
+    # in-process vs process-pool detection throughput
+    uv run python -m computer_vision.benchmark workers --requests 64 --concurrency 8
+
+    # latency/throughput of each inference backend
+    uv run python -m computer_vision.benchmark backends --backends torch,onnx,onnx-int8
+
+    # full suite over the synthetic corpus (or --corpus DIR of recorded photos)
+    uv run python -m computer_vision.benchmark suite --output before.json
+    uv run python -m computer_vision.benchmark suite --output after.json
+    uv run python -m computer_vision.benchmark compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+# The benchmarks reuse a handful of images, so keep the result cache out of it
+os.environ.setdefault("CV_CACHE_SIZE", "0")
+
+import cv2
+import numpy as np
+from cv2 import aruco
+
+from app.models import BoundingBox
+from computer_vision.backends import load_backend_model
+from computer_vision.config import CV_YOLO_WEIGHTS
+from computer_vision.cv import (
+    MARKER_ID,
+    bytes_to_numpy,
+    detect_object_dimensions,
+    detect_objects_yolo,
+)
+from computer_vision.executor import run_in_cv_pool
+from computer_vision.registry import get_model, warmup_model
+from computer_vision.workers import CVProcessPool
+
+
+def synthetic_image(
+    width: int = 1920,
+    height: int = 1080,
+    objects: int = 2,
+    with_marker: bool = True,
+    seed: int = 0,
+) -> bytes:
+    """Draw a JPEG with some coloured boxes and (optionally) the ArUco marker."""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+
+    for _ in range(objects):
+        w = rng.integers(width // 8, width // 3)
+        h = rng.integers(height // 8, height // 3)
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        colour = tuple(int(c) for c in rng.integers(0, 200, size=3))
+        cv2.rectangle(img, (int(x), int(y)), (int(x + w), int(y + h)), colour, -1)
+
+    if with_marker:
+        marker_px = max(40, min(width, height) // 8)
+        aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
+        marker = aruco.generateImageMarker(aruco_dict, MARKER_ID, marker_px)
+        pad = marker_px // 4
+        img[pad - 4 : pad + marker_px + 4, pad - 4 : pad + marker_px + 4] = 255
+        img[pad : pad + marker_px, pad : pad + marker_px] = marker[..., None]
+
+    _, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def run_load(
+    detect: Callable[[bytes], list],
+    images: List[bytes],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Fire `requests` detections at `concurrency` and report throughput/latency."""
+    latencies = []
+
+    def one(i: int) -> None:
+        start = time.perf_counter()
+        detect(images[i % len(images)])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return load_report(latencies, requests, concurrency, elapsed)
+
+
+def run_async_load(
+    detect: Callable[[bytes], Awaitable[list]],
+    images: List[bytes],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Like run_load, but `detect` is awaited on one event loop, the way the
+    detect route calls it, so the CV pool's thread limit applies as in the API."""
+    latencies = []
+
+    async def one(i: int, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            start = time.perf_counter()
+            await detect(images[i % len(images)])
+            latencies.append(time.perf_counter() - start)
+
+    async def run_all() -> None:
+        slots = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(one(i, slots) for i in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    return load_report(latencies, requests, concurrency, elapsed)
+
+
+def load_report(
+    latencies: List[float], requests: int, concurrency: int, elapsed: float
+) -> dict:
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+    }
+
+
+def compare_execution_modes(requests: int, concurrency: int, workers: int) -> dict:
+    images = [synthetic_image(seed=i) for i in range(8)]
+
+    # Both paths are called the way dispatch_detection calls them, so the
+    # in-process one is capped by the CV pool's threads like in the API
+
+    # In-process path: shared model, inference serialized by the registry lock
+    get_model()
+    in_process = run_async_load(
+        lambda image: run_in_cv_pool(detect_objects_yolo, image),
+        images,
+        requests,
+        concurrency,
+    )
+
+    # Process pool path: one warm model per worker, frames via shared memory
+    pool = CVProcessPool(workers)
+    try:
+        pool.warm_up()
+        process_pool = run_async_load(pool.detect_async, images, requests, concurrency)
+    finally:
+        pool.shutdown()
+
+    return {
+        "in_process": in_process,
+        "process_pool": {**process_pool, "workers": workers},
+        "speedup": round(
+            process_pool["throughput_rps"] / in_process["throughput_rps"], 2
+        ),
+    }
+
+
+def compare_backends(backends: List[str], requests: int, batch_size: int) -> dict:
+    """Time single-image latency and batched throughput for each backend.
+
+    Backends are given as "torch", "onnx", "onnx-int8", "openvino" or
+    "openvino-int8". Images are decoded up front so only inference is timed.
+    """
+    frames = [bytes_to_numpy(synthetic_image(seed=i)) for i in range(8)]
+    report = {}
+
+    for spec in backends:
+        backend, _, variant = spec.partition("-")
+        model = load_backend_model(CV_YOLO_WEIGHTS, backend, int8=variant == "int8")
+        warmup_model(model)
+
+        single = run_load(
+            lambda frame: model(frame, conf=0.3, imgsz=640, verbose=False),
+            frames,
+            requests,
+            concurrency=1,
+        )
+
+        batch = [frames[i % len(frames)] for i in range(batch_size)]
+        start = time.perf_counter()
+        for _ in range(max(1, requests // batch_size)):
+            model(batch, conf=0.3, imgsz=640, verbose=False)
+        elapsed = time.perf_counter() - start
+
+        report[spec] = {
+            "p50_ms": single["p50_ms"],
+            "p95_ms": single["p95_ms"],
+            "single_rps": single["throughput_rps"],
+            "batched_rps": round(
+                max(1, requests // batch_size) * batch_size / elapsed, 2
+            ),
+        }
+
+    baseline = report.get("torch")
+    if baseline:
+        for spec, result in report.items():
+            result["speedup_vs_torch"] = round(
+                result["single_rps"] / baseline["single_rps"], 2
+            )
+
+    return report
+
+
+# Resolutions (phone-ish to webcam) x object counts x marker on/off
+CORPUS_SIZES = [(640, 480), (1920, 1080), (4032, 3024)]
+CORPUS_OBJECTS = [0, 3]
+
+SUITE_TARGETS = ("bytes_to_numpy", "detect_objects_yolo", "dimensions", "route")
+
+# Metrics compared by `compare`, and whether a higher value is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "throughput_rps": True,
+    "peak_traced_mb": False,
+}
+
+
+def synthetic_corpus() -> Dict[str, bytes]:
+    """The bundled corpus: every size/object count/marker combination, seeded."""
+    corpus = {}
+    for seed, (width, height) in enumerate(CORPUS_SIZES):
+        for objects in CORPUS_OBJECTS:
+            for with_marker in (True, False):
+                marker = "marker" if with_marker else "nomarker"
+                name = f"{width}x{height}_{objects}obj_{marker}"
+                corpus[name] = synthetic_image(
+                    width, height, objects, with_marker, seed=seed
+                )
+    return corpus
+
+
+def load_corpus(directory: str) -> Dict[str, bytes]:
+    """Load a recorded corpus: every .jpg/.jpeg/.png in a directory."""
+    paths = sorted(
+        path
+        for path in Path(directory).iterdir()
+        if path.suffix.lower() in (".jpg", ".jpeg", ".png")
+    )
+    if not paths:
+        raise SystemExit(f"No .jpg/.png images in {directory}")
+    return {path.name: path.read_bytes() for path in paths}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(
+    fn: Callable[[bytes], object], corpus: Dict[str, bytes], repeat: int
+) -> dict:
+    """Time `fn` over the corpus `repeat` times, then measure its peak memory.
+
+    Memory is a separate pass because tracemalloc slows everything down. It
+    sees Python and numpy allocations, not OpenCV's or torch's own buffers, so
+    max_rss_mb (the process high-water mark so far) is reported as well.
+    """
+    images = list(corpus.values())
+    fn(images[0])  # warm up lazy state (model, detectors) outside the timings
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            call_start = time.perf_counter()
+            fn(image)
+            latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        for image in images:
+            fn(image)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "max_rss_mb": round(_max_rss_mb(), 1),
+    }
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def _route_detect() -> Callable[[bytes], object]:
+    """POST to /items/detect in-process, through the full FastAPI stack."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.state.db import items_store
+
+    client = TestClient(app)
+
+    def post(image_bytes: bytes) -> None:
+        files = {"image": ("bench.jpg", image_bytes, "image/jpeg")}
+        response = client.post("/items/detect", files=files)
+        # nothing detected is a 500 but still a complete request
+        if response.status_code not in (200, 500):
+            raise RuntimeError(f"/items/detect returned {response.status_code}")
+        items_store.clear()
+
+    return post
+
+
+def run_suite(corpus: Dict[str, bytes], targets: List[str], repeat: int = 3) -> dict:
+    """Benchmark each target over the corpus and return a JSON-able report."""
+    bbox = BoundingBox(x_min=0, y_min=0, x_max=200, y_max=100)
+    functions = {
+        "bytes_to_numpy": lambda: bytes_to_numpy,
+        "detect_objects_yolo": lambda: detect_objects_yolo,
+        "dimensions": lambda: lambda image: detect_object_dimensions(image, bbox),
+        "route": _route_detect,
+    }
+
+    results = {}
+    for target in targets:
+        if target not in functions:
+            raise ValueError(
+                f"Unknown target {target} (expected one of {SUITE_TARGETS})"
+            )
+        results[target] = measure(functions[target](), corpus, repeat)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "weights": CV_YOLO_WEIGHTS,
+            "images": len(corpus),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> dict:
+    """Diff two suite reports and list metrics that got worse by > threshold."""
+    changes = {}
+    regressions = []
+
+    for target, before in baseline["results"].items():
+        after = current["results"].get(target)
+        if after is None:
+            continue
+        changes[target] = {}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not before.get(metric):
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            changes[target][metric] = round(change, 3)
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(
+                    f"{target}.{metric}: {before[metric]} -> {after[metric]}"
+                )
+
+    return {"threshold": threshold, "changes": changes, "regressions": regressions}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the CV pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    workers = commands.add_parser("workers", help="in-process vs process pool")
+    workers.add_argument("--requests", type=int, default=64)
+    workers.add_argument("--concurrency", type=int, default=8)
+    workers.add_argument("--workers", type=int, default=8)
+
+    backends = commands.add_parser("backends", help="compare inference backends")
+    backends.add_argument("--backends", default="torch,onnx,onnx-int8")
+    backends.add_argument("--requests", type=int, default=64)
+    backends.add_argument("--batch-size", type=int, default=8)
+
+    suite = commands.add_parser("suite", help="latency/memory of each CV stage")
+    suite.add_argument("--corpus", help="directory of recorded images to use")
+    suite.add_argument("--targets", default=",".join(SUITE_TARGETS))
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--output", help="also write the report to this file")
+
+    compare = commands.add_parser("compare", help="fail on regressions vs a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command == "workers":
+        report = compare_execution_modes(args.requests, args.concurrency, args.workers)
+    elif args.command == "backends":
+        report = compare_backends(
+            args.backends.split(","), args.requests, args.batch_size
+        )
+    elif args.command == "suite":
+        corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+        report = run_suite(corpus, args.targets.split(","), args.repeat)
+        if args.output:
+            Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        report = compare_reports(
+            json.loads(Path(args.baseline).read_text()),
+            json.loads(Path(args.current).read_text()),
+            args.threshold,
+        )
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if report["regressions"] else 0)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,178 @@
+"""Offline bulk detection over a directory or tarball of photos.
+
+Every image goes through the same detection + dimension estimation as
+/items/detect, spread over a pool of worker processes that each hold a warm
+model. Results are written as NDJSON, one line per image:
+
+    {"source": "shelf/IMG_0001.jpg", "cv_results": [...], "error": null}
+
+Run from the backend folder:
+
+    uv run python -m computer_vision.bulk photos/ --output results.ndjson
+    uv run python -m computer_vision.bulk catalog.tar.gz --workers 8 \\
+        --api-url http://localhost:8000 --trip-id <trip>
+
+With --api-url each detection is also created as an item through the API
+(the item store lives in the API process).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import IO, Iterator, Optional, Tuple
+
+import requests
+
+from app.models import CVResult, Item
+from computer_vision.config import CV_PROCESS_WORKERS
+from computer_vision.cv import detect_objects_yolo
+from computer_vision.workers import _init_worker
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def iter_images(source: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, bytes) for every image in a directory tree or tarball."""
+    path = Path(source)
+
+    if path.is_dir():
+        for file in sorted(path.rglob("*")):
+            if file.is_file() and file.suffix.lower() in IMAGE_SUFFIXES:
+                yield str(file.relative_to(path)), file.read_bytes()
+        return
+
+    # stream mode reads members in order without loading the index first
+    with tarfile.open(path, "r|*") as tar:
+        for member in tar:
+            if member.isfile() and member.name.lower().endswith(IMAGE_SUFFIXES):
+                yield member.name, tar.extractfile(member).read()
+
+
+def _init_bulk_worker(threads: int) -> None:
+    # N processes each using every core for torch just fight over the CPU
+    import torch
+
+    torch.set_num_threads(threads)
+    _init_worker()
+
+
+def detect_file(source: str, image_bytes: bytes) -> dict:
+    """Worker side: detect objects in one image and return its NDJSON record."""
+    try:
+        cv_results = detect_objects_yolo(image_bytes)
+    except Exception as e:
+        return {"source": source, "cv_results": [], "error": repr(e)}
+    return {
+        "source": source,
+        "cv_results": [result.model_dump(mode="json") for result in cv_results],
+        "error": None,
+    }
+
+
+class ItemUploader:
+    """Creates an item through the API for every detection."""
+
+    def __init__(self, api_url: str, trip_id: Optional[str] = None):
+        # imported here so plain NDJSON runs don't load the API routes
+        from app.routes.item import estimate_volume
+
+        self.estimate_volume = estimate_volume
+        self.url = api_url.rstrip("/") + "/items/"
+        self.params = {"trip_id": trip_id} if trip_id else {}
+        self.session = requests.Session()
+
+    def upload(self, record: dict) -> None:
+        for raw in record["cv_results"]:
+            cv_result = CVResult(**raw)
+            item = Item(
+                cv_result=cv_result,
+                estimated_volume_cm3=self.estimate_volume(cv_result),
+            )
+            response = self.session.post(
+                self.url, json=item.model_dump(mode="json"), params=self.params
+            )
+            response.raise_for_status()
+
+
+def run_bulk(
+    source: str,
+    out: IO[str],
+    executor: Executor,
+    max_pending: int,
+    uploader: Optional[ItemUploader] = None,
+) -> dict:
+    """Detect every image in `source`, writing NDJSON records as they finish.
+
+    At most `max_pending` images are read ahead, so a huge tarball is never
+    held in memory all at once. Records come out in completion order.
+    """
+    stats = {"images": 0, "detections": 0, "errors": 0}
+    pending = set()
+
+    def drain() -> None:
+        nonlocal pending
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            record = future.result()
+            stats["images"] += 1
+            stats["detections"] += len(record["cv_results"])
+            if record["error"]:
+                stats["errors"] += 1
+            if uploader is not None:
+                uploader.upload(record)
+            out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    start = time.perf_counter()
+    for source_name, image_bytes in iter_images(source):
+        pending.add(executor.submit(detect_file, source_name, image_bytes))
+        if len(pending) >= max_pending:
+            drain()
+    while pending:
+        drain()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["images_per_s"] = round(stats["images"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help="directory or tarball of .jpg/.png images")
+    parser.add_argument("--output", help="NDJSON file to write (default: stdout)")
+    parser.add_argument("--workers", type=int, default=CV_PROCESS_WORKERS)
+    parser.add_argument("--api-url", help="also create items through this API")
+    parser.add_argument("--trip-id", help="add the created items to this trip")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    uploader = ItemUploader(args.api_url, args.trip_id) if args.api_url else None
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    # spawn rather than fork: forking a process that has torch loaded is unsafe
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_bulk_worker,
+        initargs=(threads,),
+    )
+    try:
+        stats = run_bulk(args.source, out, executor, workers * 4, uploader)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if out is not sys.stdout:
+            out.close()
+
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.models import CVResult
+from computer_vision.calibration import calibration_store
+from computer_vision.config import CV_CACHE_MODE, CV_CACHE_SIZE, CV_CACHE_TTL_S
+
+
+def content_hash(image_bytes: bytes) -> str:
+    """Hash of the exact uploaded bytes."""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+def perceptual_hash(greyscale) -> str:
+    """64-bit difference hash, stable across re-encoding and resizing."""
+    small = cv2.resize(greyscale, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+class DetectionCache:
+    """Bounded LRU of detection results keyed by image content.
+
+    In "exact" mode the key is a hash of the upload bytes. In "perceptual" mode
+    it's a difference hash of the decoded image, so the same photo re-encoded
+    by a phone's gallery still hits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CV_CACHE_SIZE,
+        ttl_s: float = CV_CACHE_TTL_S,
+        mode: str = CV_CACHE_MODE,
+    ):
+        if mode not in ("exact", "perceptual"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.mode = mode
+
+        self._entries: "OrderedDict[str, Tuple[float, List[CVResult]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, context) -> str:
+        """Build the cache key for an ImageContext."""
+        if self.mode == "perceptual" and context.img is not None:
+            key = "p:" + perceptual_hash(context.greyscale)
+        else:
+            key = "x:" + content_hash(context.image_bytes)
+
+        # Calibrated stations can measure the same photo differently, and a
+        # station's own results go stale once its calibration is re-measured
+        # or reset, so the stored scale is part of the key
+        if context.station_id is not None:
+            key += "@" + context.station_id
+            calibration = calibration_store.get(context.station_id)
+            if calibration is not None:
+                key += f":{calibration.px_per_cm:.6g}"
+        return key
+
+    def get(self, key: str) -> Optional[List[CVResult]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_s:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Callers attach results to items, so never hand out the stored objects
+        return [result.model_copy(deep=True) for result in entry[1]]
+
+    def put(self, key: str, results: List[CVResult]) -> None:
+        stored = [result.model_copy(deep=True) for result in results]
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_cache: Optional[DetectionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_detection_cache() -> Optional[DetectionCache]:
+    """Return the process-wide detection cache, or None if it's disabled."""
+    global _cache
+    if CV_CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DetectionCache()
+        return _cache
@@ -0,0 +1,105 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from computer_vision.config import (
+    CV_CALIBRATION_REVALIDATE_EVERY,
+    CV_CALIBRATION_TTL_S,
+)
+
+
+@dataclass
+class Calibration:
+    """Last good scale for one packing station."""
+
+    px_per_cm: float
+    measured_at: float
+    frames_since_check: int = 0
+
+
+class CalibrationStore:
+    """Remembers px_per_cm per station so fixed cameras skip marker detection.
+
+    A frame from a calibrated station reuses the stored scale. Every
+    `revalidate_every` frames (or once `ttl_s` has passed) the marker is
+    measured again. If it's hidden on that frame, the last good scale is used
+    instead of the 1.0 fallback, and the next frame tries again.
+    """
+
+    def __init__(
+        self,
+        revalidate_every: int = CV_CALIBRATION_REVALIDATE_EVERY,
+        ttl_s: float = CV_CALIBRATION_TTL_S,
+    ):
+        self.revalidate_every = revalidate_every
+        self.ttl_s = ttl_s
+
+        self._sessions: Dict[str, Calibration] = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.reused = 0
+        self.measured = 0
+        self.marker_missing = 0
+
+    def prepare(self, context) -> None:
+        """Before detection: hand the context a stored scale if it's still valid."""
+        if context.station_id is None:
+            return
+
+        with self._lock:
+            session = self._sessions.get(context.station_id)
+            if session is None:
+                return
+
+            fresh = time.monotonic() - session.measured_at <= self.ttl_s
+            if fresh and session.frames_since_check < self.revalidate_every:
+                session.frames_since_check += 1
+                self.reused += 1
+                context.known_px_per_cm = session.px_per_cm
+            else:
+                # due for re-validation, but keep the old value in case the marker is hidden
+                context.last_good_px_per_cm = session.px_per_cm
+
+    def update(self, context) -> None:
+        """After detection: store the scale if the marker was measured on this frame."""
+        if context.station_id is None or not context.marker_searched:
+            return
+
+        with self._lock:
+            if context.measured_px_per_cm is None:
+                self.marker_missing += 1
+                return
+
+            self.measured += 1
+            self._sessions[context.station_id] = Calibration(
+                px_per_cm=context.measured_px_per_cm, measured_at=time.monotonic()
+            )
+
+    def get(self, station_id: str) -> Optional[Calibration]:
+        with self._lock:
+            return self._sessions.get(station_id)
+
+    def reset(self, station_id: str) -> bool:
+        """Forget a station's calibration (e.g. after the camera was moved)."""
+        with self._lock:
+            return self._sessions.pop(station_id, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self.reused = self.measured = self.marker_missing = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "stations": len(self._sessions),
+                "frames_reused": self.reused,
+                "frames_measured": self.measured,
+                "marker_missing": self.marker_missing,
+                "revalidate_every": self.revalidate_every,
+            }
+
+
+calibration_store = CalibrationStore()
@@ -0,0 +1,102 @@
+import os
+
+# Settings for the CV pipeline. Everything can be overridden with an
+# environment variable of the same name, e.g. `CV_YOLO_WEIGHTS=yolov8n.pt`.
+
+# YOLO weights loaded at startup and shared by every request
+CV_YOLO_WEIGHTS = os.getenv("CV_YOLO_WEIGHTS", "yolov8s.pt")
+
+# Load + warm up the model when the FastAPI app starts (set to 0 to load lazily)
+CV_PRELOAD_MODEL = os.getenv("CV_PRELOAD_MODEL", "1") == "1"
+
+# Most images accepted by /items/detect/batch in one request
+CV_MAX_BATCH_IMAGES = int(os.getenv("CV_MAX_BATCH_IMAGES", "32"))
+
+# Largest image upload accepted by the detect endpoints, in bytes
+CV_MAX_UPLOAD_BYTES = int(os.getenv("CV_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+# Micro-batching: group concurrent /items/detect requests into one model call
+CV_MICRO_BATCHING = os.getenv("CV_MICRO_BATCHING", "0") == "1"
+CV_BATCH_MAX_SIZE = int(os.getenv("CV_BATCH_MAX_SIZE", "8"))
+CV_BATCH_MAX_WAIT_MS = float(os.getenv("CV_BATCH_MAX_WAIT_MS", "10"))
+
+# Size of the thread pool that runs inference + ArUco off the event loop
+CV_WORKER_THREADS = int(os.getenv("CV_WORKER_THREADS", "4"))
+
+# Where detection runs: "thread" (in the API process, on the pool above) or
+# "process" (a pool of worker processes, each with its own warm model)
+CV_EXECUTION_MODE = os.getenv("CV_EXECUTION_MODE", "thread")
+CV_PROCESS_WORKERS = int(os.getenv("CV_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+# Detection result cache for repeat uploads ("exact" byte hash or "perceptual"
+# hash that also matches re-encoded copies). Set CV_CACHE_SIZE=0 to disable.
+CV_CACHE_SIZE = int(os.getenv("CV_CACHE_SIZE", "256"))
+CV_CACHE_TTL_S = float(os.getenv("CV_CACHE_TTL_S", "600"))
+CV_CACHE_MODE = os.getenv("CV_CACHE_MODE", "exact")
+
+# Inference backend: "torch" (stock .pt), "onnx" (onnxruntime) or "openvino".
+# Exported models are written next to the weights the first time they're used.
+CV_BACKEND = os.getenv("CV_BACKEND", "torch")
+# Use the INT8-quantized export (onnx / openvino backends only)
+CV_INT8 = os.getenv("CV_INT8", "0") == "1"
+
+# Adaptive resolution: run a cheap low-resolution pass first and only re-run
+# at the next size up when no target class clears CV_ESCALATION_CONF
+CV_ADAPTIVE_RESOLUTION = os.getenv("CV_ADAPTIVE_RESOLUTION", "0") == "1"
+CV_RESOLUTION_TIERS = [
+    int(size) for size in os.getenv("CV_RESOLUTION_TIERS", "320,640").split(",")
+]
+CV_ESCALATION_CONF = float(os.getenv("CV_ESCALATION_CONF", "0.5"))
+
+# Decode large photos at 1/2, 1/4 or 1/8 size, keeping the long side at least
+# CV_DECODE_MIN_SIDE pixels (YOLO only looks at 640, ArUco wants a bit more)
+CV_REDUCED_DECODE = os.getenv("CV_REDUCED_DECODE", "1") == "1"
+CV_DECODE_MIN_SIDE = int(os.getenv("CV_DECODE_MIN_SIDE", "1280"))
+
+# ArUco marker search starts on a downscaled copy no bigger than this (px)
+CV_ARUCO_COARSE_SIDE = int(os.getenv("CV_ARUCO_COARSE_SIDE", "960"))
+
+# Calibration sessions: frames sent with a station_id reuse that station's last
+# good px_per_cm, and re-measure the marker every N frames or after the TTL
+CV_CALIBRATION_REVALIDATE_EVERY = int(
+    os.getenv("CV_CALIBRATION_REVALIDATE_EVERY", "10")
+)
+CV_CALIBRATION_TTL_S = float(os.getenv("CV_CALIBRATION_TTL_S", "3600"))
+
+# Streaming detection (/items/detect/stream): YOLO only runs on keyframes, i.e.
+# every N frames or when the scene moved more than the motion threshold
+# (mean pixel difference, 0-1) since the last keyframe. Objects become items
+# once they've been seen on CV_STREAM_CONFIRM_HITS keyframes.
+CV_STREAM_KEYFRAME_INTERVAL = int(os.getenv("CV_STREAM_KEYFRAME_INTERVAL", "10"))
+CV_STREAM_MOTION_THRESHOLD = float(os.getenv("CV_STREAM_MOTION_THRESHOLD", "0.08"))
+CV_STREAM_CONFIRM_HITS = int(os.getenv("CV_STREAM_CONFIRM_HITS", "2"))
+CV_STREAM_MAX_FRAME_BYTES = int(
+    os.getenv("CV_STREAM_MAX_FRAME_BYTES", str(20 * 1024 * 1024))
+)
+
+# Debug image capture: save a sample of received images to CV_DEBUG_IMAGE_DIR
+# from a background thread, keeping at most CV_DEBUG_MAX_FILES files and
+# CV_DEBUG_MAX_BYTES bytes (oldest deleted first)
+CV_DEBUG_IMAGES = os.getenv("CV_DEBUG_IMAGES", "0") == "1"
+CV_DEBUG_IMAGE_DIR = os.getenv("CV_DEBUG_IMAGE_DIR", "debug_images")
+CV_DEBUG_SAMPLE_RATE = float(os.getenv("CV_DEBUG_SAMPLE_RATE", "1.0"))
+CV_DEBUG_MAX_FILES = int(os.getenv("CV_DEBUG_MAX_FILES", "500"))
+CV_DEBUG_MAX_BYTES = int(os.getenv("CV_DEBUG_MAX_BYTES", str(500 * 1024 * 1024)))
+CV_DEBUG_QUEUE_SIZE = int(os.getenv("CV_DEBUG_QUEUE_SIZE", "64"))
+
+# Per-stage timing histograms for the detection pipeline (see /items/detect/stats),
+# and optionally a Server-Timing header with each detect response's stages
+CV_STAGE_TIMING = os.getenv("CV_STAGE_TIMING", "1") == "1"
+CV_TRACE_HEADERS = os.getenv("CV_TRACE_HEADERS", "0") == "1"
+
+# Model tiering: weights to fall back through under load, most accurate first,
+# e.g. "yolov8s.pt,yolov8n.pt". Detections step down a tier when more than
+# CV_TIER_QUEUE_DEPTH are in flight or their latency average (EWMA) goes over
+# CV_TIER_LATENCY_MS (0 = ignore latency). CV_MAX_IN_FLIGHT > 0 sheds anything
+# beyond that many concurrent detections with a 503. Each image in a batch
+# counts as one detection.
+CV_MODEL_TIERS = os.getenv("CV_MODEL_TIERS", CV_YOLO_WEIGHTS).split(",")
+CV_TIER_QUEUE_DEPTH = int(os.getenv("CV_TIER_QUEUE_DEPTH", "4"))
+CV_TIER_LATENCY_MS = float(os.getenv("CV_TIER_LATENCY_MS", "0"))
+CV_TIER_EWMA_ALPHA = float(os.getenv("CV_TIER_EWMA_ALPHA", "0.2"))
+CV_MAX_IN_FLIGHT = int(os.getenv("CV_MAX_IN_FLIGHT", "0"))
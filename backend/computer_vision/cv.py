@@ -1,13 +1,24 @@
-import os
-from datetime import datetime
-from typing import List, Tuple
+import threading
+from typing import Callable, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 from cv2 import aruco
-from ultralytics import YOLO
 
 from app.models import BoundingBox, CVResult, Dimensions
+from computer_vision.cache import get_detection_cache
+from computer_vision.calibration import calibration_store
+from computer_vision.config import (
+    CV_ADAPTIVE_RESOLUTION,
+    CV_ARUCO_COARSE_SIDE,
+    CV_ESCALATION_CONF,
+    CV_RESOLUTION_TIERS,
+)
+from computer_vision.debug_images import get_debug_writer
+from computer_vision.decode import decode_image
+from computer_vision.metrics import resolution_counters, timed
+from computer_vision.registry import get_model, inference_lock
+from computer_vision.tiering import model_tiers
 
 
 def bytes_to_numpy(image_bytes: bytes):
@@ -16,82 +27,356 @@ def bytes_to_numpy(image_bytes: bytes):
     return img
 
 
-# Debug function that saves image locally
-# Can remove later
 def debug_test_image(image_bytes: bytes):
-    # Verify image format and log info
-    print(f"\nReceived image size={len(image_bytes)} bytes, type={type(image_bytes)}")
-    print(
-        f"First 20 bytes (hex): {image_bytes[:20].hex() if len(image_bytes) >= 20 else image_bytes.hex()}"
-    )
+    """Queue a received image to be saved in debug_images/.
+
+    Only a sample is kept (CV_DEBUG_SAMPLE_RATE), and the write happens on the
+    debug writer's thread, so this is cheap enough to leave on in production.
+    """
+    get_debug_writer().submit(image_bytes)
+
+
+# Constants based on the marker I chose
+PHYSICAL_MARKER_CM = 5.0
+MARKER_ID = 2
+
+# Default fallback for debugging (large dimension will indicate marker wasn't detected)
+FALLBACK_PX_PER_CM = 1.0
+
+# Define the list of target class names
+TARGET_CLASSES = {
+    "backpack",
+    "handbag",
+    "suitcase",
+    "bottle",
+    "laptop",
+    "cell phone",
+    "book",
+    "toothbrush",
+}
+
+
+class ImageContext:
+    """Per-image state shared by every detection in one frame.
+
+    The upload is decoded once, and the greyscale copy and ArUco scale are
+    computed lazily the first time they're needed, then reused.
+
+    Large photos are decoded at reduced size; `scale` maps pixels in `img`
+    back to the original photo, and bounding boxes and px_per_cm are always
+    reported in original-pixel units.
+
+    Frames from a calibrated station (see calibration.py) carry a known scale
+    and skip the marker search entirely.
+    """
+
+    def __init__(
+        self,
+        image_bytes: Optional[bytes] = None,
+        img=None,
+        scale: float = 1.0,
+        station_id: Optional[str] = None,
+    ):
+        self.image_bytes = image_bytes
+        self._img = img
+        self.scale = scale
+        self._greyscale = None
+        self._px_per_cm: Optional[float] = None
+
+        # Calibration session state
+        self.station_id = station_id
+        self.known_px_per_cm: Optional[float] = None
+        self.last_good_px_per_cm: Optional[float] = None
+        self.marker_searched = False
+        self.measured_px_per_cm: Optional[float] = None
+
+    @property
+    def img(self):
+        if self._img is None:
+            with timed("decode"):
+                self._img, self.scale = decode_image(self.image_bytes)
+        return self._img
+
+    @property
+    def greyscale(self):
+        # Converting image to black and white for contrast
+        if self._greyscale is None:
+            img = self.img
+            with timed("greyscale"):
+                self._greyscale = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return self._greyscale
+
+    @property
+    def px_per_cm(self) -> float:
+        """Pixels per cm in original-image units."""
+        if self._px_per_cm is None:
+            if self.known_px_per_cm is not None:
+                self._px_per_cm = self.known_px_per_cm
+            else:
+                self._px_per_cm = self.measure_px_per_cm()
+        return self._px_per_cm
+
+    def measure_px_per_cm(self) -> float:
+        greyscale = self.greyscale
+        with timed("aruco"):
+            px_per_cm = find_px_per_cm(greyscale)
+        self.marker_searched = True
+
+        if px_per_cm is not None:
+            self.measured_px_per_cm = px_per_cm * self.scale
+            return self.measured_px_per_cm
+        if self.last_good_px_per_cm is not None:
+            return self.last_good_px_per_cm
+        return FALLBACK_PX_PER_CM
+
+
+def find_px_per_cm(greyscale) -> Optional[float]:
+    """Find the ArUco marker in a greyscale image and return pixels per cm.
+
+    The marker is searched for on a downscaled copy first, then its corners are
+    re-detected in a small full-resolution crop around it, which gives the same
+    measurement as a full-resolution search for a fraction of the cost.
+    Returns None if the marker isn't in the image.
+    """
+    marker_corners = None
+
+    # Coarse pass on a pyramid level no bigger than CV_ARUCO_COARSE_SIDE
+    small, factor = greyscale, 1
+    while max(small.shape[:2]) > CV_ARUCO_COARSE_SIDE:
+        small, factor = cv2.pyrDown(small), factor * 2
+
+    if factor > 1:
+        coarse = find_marker_corners(small)
+        if coarse is not None:
+            marker_corners = refine_marker_corners(greyscale, coarse * factor)
+
+    # Marker too small to see when downscaled: search the whole image
+    if marker_corners is None:
+        marker_corners = find_marker_corners(greyscale)
+
+    if marker_corners is None:
+        return None
+
+    marker_width_px = np.linalg.norm(marker_corners[0] - marker_corners[1])
+    return float(marker_width_px / PHYSICAL_MARKER_CM)
+
+
+# ArucoDetector isn't safe to share between threads, so each thread builds one
+_aruco = threading.local()
+
+
+def get_aruco_detector() -> aruco.ArucoDetector:
+    """Return this thread's cached ArUco detector."""
+    detector = getattr(_aruco, "detector", None)
+    if detector is None:
+        aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
+        detector = aruco.ArucoDetector(aruco_dict)
+        _aruco.detector = detector
+    return detector
+
+
+def find_marker_corners(greyscale) -> Optional[np.ndarray]:
+    """Detect our marker and return its 4 corners (pixels), or None."""
+    corners, ids, _ = get_aruco_detector().detectMarkers(greyscale)
 
-    # Check for JPEG signature (FF D8 FF)
-    is_jpeg = image_bytes[:3] == b"\xff\xd8\xff"
-    # Check for PNG signature (89 50 4E 47)
-    is_png = image_bytes[:4] == b"\x89PNG"
-
-    if is_jpeg:
-        print(f"Image format: JPEG (detected by magic bytes)")
-    elif is_png:
-        print(f"Image format: PNG (detected by magic bytes)")
-    else:
-        print(f"WARNING: Unknown image format")
-        print(f"First 20 bytes (hex): {image_bytes[:20].hex()}")
-
-    # Save the raw image bytes to verify it's valid (for debugging)
-    try:
-        debug_dir = "debug_images"
-        os.makedirs(debug_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        extension = "jpg" if is_jpeg else ("png" if is_png else "bin")
-        debug_path = os.path.join(debug_dir, f"received_image_{timestamp}.{extension}")
-
-        with open(debug_path, "wb") as f:
-            f.write(image_bytes)
-        print(f"Saved debug image to: {debug_path}")
-    except Exception as e:
-        print(f"WARNING: Could not save debug image: {e}")
-
-    print("=== End Image Verification ===\n")
-    return
-
-
-def detect_objects_yolo(image_bytes: bytes) -> List[CVResult]:
-    model = YOLO("yolov8s.pt")
-    img = bytes_to_numpy(image_bytes)
-    results = model(
-        img,
-        conf=0.3,  # Confidence threshold (at least 30% certainty required for a detection)
-        imgsz=640,  # Input image size (standard 640x640 for YOLOv8n)
+    # Check marker against dictionary
+    if ids is None:
+        return None
+    return next(
+        (corners[i][0] for i, id_ in enumerate(ids) if id_[0] == MARKER_ID), None
     )
 
-    # Define the list of target class names
-    TARGET_CLASSES = {
-        "backpack",
-        "handbag",
-        "suitcase",
-        "bottle",
-        "laptop",
-        "cell phone",
-        "book",
-        "toothbrush",
-    }
 
-    detections_list = []
+def refine_marker_corners(greyscale, approx_corners: np.ndarray) -> np.ndarray:
+    """Re-detect the marker in a full-resolution crop around approximate corners."""
+    height, width = greyscale.shape[:2]
+    x_min, y_min = approx_corners.min(axis=0)
+    x_max, y_max = approx_corners.max(axis=0)
+
+    # Pad by half the marker size so the quiet zone around it is included
+    margin = 0.5 * max(x_max - x_min, y_max - y_min)
+    left, top = int(max(0, x_min - margin)), int(max(0, y_min - margin))
+    right = int(min(width, x_max + margin))
+    bottom = int(min(height, y_max + margin))
+
+    refined = find_marker_corners(greyscale[top:bottom, left:right])
+    if refined is None:
+        # Couldn't re-detect in the crop, the upscaled coarse corners will do
+        return approx_corners
+    return refined + np.array([left, top], dtype=refined.dtype)
+
+
+def detect_objects_yolo(
+    image_bytes: bytes, station_id: Optional[str] = None
+) -> List[CVResult]:
+    # Decode once; every detection below reuses the same context
+    context = ImageContext(image_bytes, station_id=station_id)
+    return cached_detect(context, detect_objects_in_context)
+
+
+def cached_detect(
+    context: ImageContext, detect: Callable[[ImageContext], List[CVResult]]
+) -> List[CVResult]:
+    """Serve repeat uploads from the detection cache, running `detect` on a miss."""
+    cache = get_detection_cache()
+    if cache is None:
+        return detect(context)
+
+    key = cache.key_for(context)
+    cv_results = cache.get(key)
+    if cv_results is None:
+        cv_results = detect(context)
+        cache.put(key, cv_results)
+
+    return cv_results
+
+
+def detect_objects_in_context(
+    context: ImageContext, weights: Optional[str] = None
+) -> List[CVResult]:
+    """Run detection on an image that's already wrapped in an ImageContext.
+
+    `weights` picks the model; by default it's the tier the current load calls for.
+    """
+    weights = weights or model_tiers.current()
+
+    # Shared model, loaded and warmed up once per process
+    with timed("model"):
+        model = get_model(weights)
+    calibration_store.prepare(context)
+    results = run_model(model, [context.img], weights)
 
     # YOLO returns a list, but we only pass one image, so we'll only get one result
-    result = results[0]
+    cv_results = build_cv_results(results[0], model.names, context, weights)
+    calibration_store.update(context)
+    return cv_results
+
+
+def run_model(model, images: list, weights: Optional[str] = None) -> list:
+    """Run YOLO on a list of images and return one result per image.
+
+    With adaptive resolution on, every image goes through the smallest tier
+    first, and only images without a confident TARGET_CLASSES detection are
+    re-run at the next size up.
+    """
+    tiers = CV_RESOLUTION_TIERS if CV_ADAPTIVE_RESOLUTION else [640]
+    final = [None] * len(images)
+    pending = list(range(len(images)))
+
+    for level, imgsz in enumerate(tiers):
+        lock = inference_lock(weights)
+        with timed("inference_wait"):
+            lock.acquire()
+        try:
+            with timed("inference"):
+                results = model(
+                    [images[i] for i in pending],
+                    conf=0.3,  # Confidence threshold (at least 30% certainty required for a detection)
+                    imgsz=imgsz,  # Input image size (standard 640x640 for YOLOv8n)
+                )
+        finally:
+            lock.release()
+
+        last_tier = level == len(tiers) - 1
+        escalate = []
+        for i, result in zip(pending, results):
+            if last_tier or has_confident_target(result, model.names):
+                final[i] = result
+                resolution_counters.increment(f"answered_at_{imgsz}")
+            else:
+                escalate.append(i)
+
+        if escalate:
+            resolution_counters.increment("escalations", len(escalate))
+        pending = escalate
+        if not pending:
+            break
+
+    return final
+
+
+def has_confident_target(result, names) -> bool:
+    """Whether a result has a TARGET_CLASSES box above the escalation threshold."""
+    return any(
+        names[int(box.cls.item())] in TARGET_CLASSES
+        and box.conf.item() >= CV_ESCALATION_CONF
+        for box in result.boxes
+    )
+
+
+def detect_objects_yolo_batch(
+    images: List[bytes], station_ids: Optional[List[Optional[str]]] = None
+) -> List[List[CVResult]]:
+    """Run detection on several images in one batched forward pass.
+
+    Returns one list of CVResults per input image, in the same order. Images
+    that can't be decoded get an empty list instead of failing the batch.
+    """
+    # the whole batch is served by one tier
+    weights = model_tiers.current()
+    with timed("model"):
+        model = get_model(weights)
+    cache = get_detection_cache()
+
+    station_ids = station_ids or [None] * len(images)
+    contexts = [
+        ImageContext(image_bytes, station_id=station_id)
+        for image_bytes, station_id in zip(images, station_ids)
+    ]
+    detections = {id(context): [] for context in contexts}
+
+    # Only images we haven't seen recently go through the model
+    decoded = []
+    keys = {}
+    for context in contexts:
+        if context.img is None:
+            continue
+        if cache is not None:
+            keys[id(context)] = cache.key_for(context)
+            cached = cache.get(keys[id(context)])
+            if cached is not None:
+                detections[id(context)] = cached
+                continue
+        decoded.append(context)
+
+    if decoded:
+        for context in decoded:
+            calibration_store.prepare(context)
+        results = run_model(model, [context.img for context in decoded], weights)
+        for context, result in zip(decoded, results):
+            detections[id(context)] = build_cv_results(
+                result, model.names, context, weights
+            )
+            calibration_store.update(context)
+            if cache is not None:
+                cache.put(keys[id(context)], detections[id(context)])
+
+    return [detections[id(context)] for context in contexts]
+
+
+def build_cv_results(
+    result, names, context: ImageContext, weights: Optional[str] = None
+) -> List[CVResult]:
+    """Turn one YOLO result into CVResults for the classes we care about.
+
+    `weights` is recorded on each result as the model tier that served it.
+    """
+    detections_list = []
 
     # Loop through detections in the image
     for box in result.boxes:
-        # Extract the necessary data
-        confidence = box.conf.item()
-        class_id = box.cls.item()
-        class_name = model.names[int(class_id)]
-
-        # filter by class name
-        if class_name in TARGET_CLASSES:
-            coords = box.xyxy.tolist()[0]
+        with timed("postprocess"):
+            # Extract the necessary data
+            confidence = box.conf.item()
+            class_id = box.cls.item()
+            class_name = names[int(class_id)]
+
+            # filter by class name, anything not in TARGET_CLASSES is skipped
+            if class_name not in TARGET_CLASSES:
+                continue
+
+            # map back to original-image pixels if we decoded at reduced size
+            coords = [c * context.scale for c in box.xyxy.tolist()[0]]
             x_min = round(coords[0], 2)
             y_min = round(coords[1], 2)
             x_max = round(coords[2], 2)
@@ -104,51 +389,30 @@ def detect_objects_yolo(image_bytes: bytes) -> List[CVResult]:
                 y_max=y_max,
             )
 
-            dimensions = detect_object_dimensions(image_bytes, bounding_box)
+        dimensions = detect_object_dimensions(context, bounding_box)
 
-            # Create CVResult object
+        # Create CVResult object
+        with timed("cv_result"):
             cv_result = CVResult(
                 item_name=class_name,
                 class_name=class_name,
                 confidence_score=round(confidence, 2),
                 bounding_boxes=[bounding_box],
                 dimensions=dimensions,
+                model=weights,
             )
 
-            detections_list.append(cv_result)
-        # If the class name is not in TARGET_CLASSES, we just skip it
+        detections_list.append(cv_result)
 
     return detections_list
 
 
 def detect_object_dimensions(
-    image_bytes: bytes, bounding_box: BoundingBox
+    image: Union[bytes, ImageContext], bounding_box: BoundingBox
 ) -> Dimensions:
-    # Constants based on the marker I chose
-    physical_marker_cm = 5.0
-    marker_id = 2
-
-    img = bytes_to_numpy(image_bytes)
-
-    # Converting image to black and white for contrast
-    greyscale = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-    # Detect marker
-    aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
-    detector = aruco.ArucoDetector(aruco_dict)
-    corners, ids, _ = detector.detectMarkers(greyscale)
-
-    # Default fallback for debugging (large dimension will indicate marker wasn't detected)
-    px_per_cm = 1.0
-
-    # Check marker against dictionary
-    if ids is not None:
-        marker_corners = next(
-            (corners[i][0] for i, id_ in enumerate(ids) if id_[0] == marker_id), None
-        )
-        if marker_corners is not None:
-            marker_width_px = np.linalg.norm(marker_corners[0] - marker_corners[1])
-            px_per_cm = marker_width_px / physical_marker_cm
+    # Accept raw bytes for one-off calls; the marker is only searched once per context
+    context = image if isinstance(image, ImageContext) else ImageContext(image)
+    px_per_cm = context.px_per_cm
 
     # Taking in bounding box coordinates
     width_px = bounding_box.x_max - bounding_box.x_min
@@ -0,0 +1,193 @@
+import os
+import queue
+import random
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from computer_vision.cache import content_hash
+from computer_vision.config import (
+    CV_DEBUG_IMAGE_DIR,
+    CV_DEBUG_MAX_BYTES,
+    CV_DEBUG_MAX_FILES,
+    CV_DEBUG_QUEUE_SIZE,
+    CV_DEBUG_SAMPLE_RATE,
+)
+from computer_vision.decode import sniff_image_format
+
+# Sentinel put on the queue to stop the writer thread
+_STOP = object()
+
+_EXTENSIONS = {"jpeg": "jpg", "png": "png"}
+
+
+class DebugImageWriter:
+    """Saves a sample of received images to disk from a background thread.
+
+    `submit` only copies the bytes onto a bounded queue, so the request path
+    never touches the disk; when the queue is full the image is dropped.
+    Files are named by a hash of their content, so the same photo is stored
+    once and names never collide. Once the directory holds more than
+    `max_files` images or `max_bytes` bytes, the oldest are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: str = CV_DEBUG_IMAGE_DIR,
+        sample_rate: float = CV_DEBUG_SAMPLE_RATE,
+        max_files: int = CV_DEBUG_MAX_FILES,
+        max_bytes: int = CV_DEBUG_MAX_BYTES,
+        queue_size: int = CV_DEBUG_QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # name -> size of the files on disk, oldest first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        # Stats
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.duplicates = 0
+        self.evicted = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="cv-debug-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the writer after it has flushed what's already queued."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, image_bytes: bytes) -> bool:
+        """Queue an image to be saved; returns False if it was skipped."""
+        if random.random() >= self.sample_rate:
+            with self._lock:
+                self.sampled_out += 1
+            return False
+
+        try:
+            # copy: uploads are views that are released after the request
+            self._queue.put_nowait(bytes(image_bytes))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _load_existing(self) -> None:
+        """Pick up files from earlier runs so retention covers them too."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self._files[entry.name] = size
+            self._total_bytes += size
+
+    def _write(self, image_bytes: bytes) -> None:
+        extension = _EXTENSIONS.get(sniff_image_format(image_bytes), "bin")
+        name = f"{content_hash(image_bytes)}.{extension}"
+
+        if name in self._files:
+            self._files.move_to_end(name)
+            self.duplicates += 1
+            return
+
+        # write then rename, so a half-written file is never left behind
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, path)
+
+        self._files[name] = len(image_bytes)
+        self._total_bytes += len(image_bytes)
+        self.written += 1
+        self._enforce_retention()
+
+    def _enforce_retention(self) -> None:
+        while self._files and (
+            len(self._files) > self.max_files or self._total_bytes > self.max_bytes
+        ):
+            name, size = self._files.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self.evicted += 1
+
+    def _run(self) -> None:
+        try:
+            self._load_existing()
+        except OSError as e:
+            print(f"WARNING: Could not open debug image directory: {e}")
+
+        while True:
+            image_bytes = self._queue.get()
+            if image_bytes is _STOP:
+                return
+            try:
+                # only this thread touches the files, so no lock around the disk I/O
+                self._write(image_bytes)
+            except OSError as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"WARNING: Could not save debug image: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "sample_rate": self.sample_rate,
+                "queue_depth": self._queue.qsize(),
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "written": self.written,
+                "duplicates": self.duplicates,
+                "sampled_out": self.sampled_out,
+                "dropped": self.dropped,
+                "evicted": self.evicted,
+                "errors": self.errors,
+            }
+
+
+_writer: Optional[DebugImageWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_debug_writer() -> DebugImageWriter:
+    """Return the process-wide debug image writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DebugImageWriter()
+            _writer.start()
+        return _writer
+
+
+def stop_debug_writer() -> None:
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout=5)
@@ -0,0 +1,100 @@
+import struct
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from computer_vision.config import CV_DECODE_MIN_SIDE, CV_REDUCED_DECODE
+
+# imdecode flags for decoding at 1/2, 1/4 and 1/8 size. For JPEGs libjpeg does
+# the downscale inside the DCT, which is much cheaper than decoding in full.
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# JPEG start-of-frame markers (the ones that carry the image size)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7}
+_JPEG_SOF_MARKERS |= {0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def sniff_image_format(image_bytes: bytes) -> Optional[str]:
+    """Return "jpeg" or "png" from the file's magic bytes, or None."""
+    head = bytes(image_bytes[:8])
+    if head[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if head == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    return None
+
+
+def read_image_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG or PNG header without decoding it."""
+    data = memoryview(image_bytes)
+
+    # PNG: size is the first thing in the IHDR chunk
+    if bytes(data[:8]) == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if bytes(data[:2]) != b"\xff\xd8":
+        return None
+
+    # JPEG: walk the segments until we hit a start-of-frame marker
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # fill byte
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            # standalone markers have no length
+            i += 2
+            continue
+
+        (length,) = struct.unpack(">H", data[i + 2 : i + 4])
+        if marker in _JPEG_SOF_MARKERS and i + 9 <= len(data):
+            height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+            return width, height
+        i += 2 + length
+
+    return None
+
+
+def choose_reduction(size: Optional[Tuple[int, int]], min_side: int) -> int:
+    """Pick the biggest 1/2/4/8 reduction that keeps the long side >= min_side."""
+    if size is None:
+        return 1
+
+    long_side = max(size)
+    for factor in (8, 4, 2):
+        if long_side / factor >= min_side:
+            return factor
+    return 1
+
+
+def decode_image(
+    image_bytes: bytes,
+    reduced: bool = CV_REDUCED_DECODE,
+    min_side: int = CV_DECODE_MIN_SIDE,
+) -> Tuple[Optional[np.ndarray], float]:
+    """Decode an upload, shrinking large photos at decode time.
+
+    Returns the image and the scale that maps its pixels back to the original
+    image (1.0 when it was decoded at full size).
+    """
+    size = read_image_size(image_bytes)
+    factor = choose_reduction(size, min_side) if reduced else 1
+
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, _REDUCED_FLAGS[factor])
+    if img is None or factor == 1:
+        return img, 1.0
+
+    # EXIF rotation can swap width/height, so compare long sides
+    return img, max(size) / max(img.shape[:2])
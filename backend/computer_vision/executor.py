@@ -0,0 +1,43 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from computer_vision.config import CV_WORKER_THREADS
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool that CPU-heavy CV work runs on."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=CV_WORKER_THREADS, thread_name_prefix="cv-worker"
+            )
+        return _executor
+
+
+async def run_in_cv_pool(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn` on the CV pool so the event loop stays free for other requests."""
+    loop = asyncio.get_running_loop()
+    # carry the caller's context over, like asyncio.to_thread, so stage
+    # timings recorded on the pool end up in the request's trace
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), partial(context.run, fn, *args, **kwargs)
+    )
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from computer_vision.config import CV_STAGE_TIMING
+
+
+class Counters:
+    """Thread-safe named counters for CV pipeline stats."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+# How often each resolution tier answered a request, and how often we escalated
+resolution_counters = Counters()
+
+
+def resolution_stats() -> dict:
+    counts = resolution_counters.snapshot()
+    answered = {
+        int(name.rsplit("_", 1)[1]): n
+        for name, n in counts.items()
+        if name.startswith("answered_at_")
+    }
+    total = sum(answered.values())
+    return {
+        "images": total,
+        "escalations": counts.get("escalations", 0),
+        "answered_by_tier": dict(sorted(answered.items())),
+        "tier_hit_rate": {
+            size: round(n / total, 3) for size, n in sorted(answered.items())
+        },
+    }
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last one catches the rest
+_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self):
+        self.counts = [0] * len(_BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(_BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                # the overflow bucket has no upper bound, report the max instead
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                ("+inf" if bound == float("inf") else str(bound)): n
+                for bound, n in zip(_BUCKETS_MS, self.counts)
+            },
+        }
+
+
+class StageTimings:
+    """Thread-safe latency histograms, one per pipeline stage."""
+
+    def __init__(self):
+        self._stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {stage: h.snapshot() for stage, h in self._stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+# Time spent in each stage of the detection pipeline (decode, inference, ...)
+stage_timings = StageTimings()
+
+# Spans recorded for the current request, when something is collecting them
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "cv_spans", default=None
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block as one pipeline stage.
+
+    The duration goes into the stage's histogram and, if the current request
+    is collecting spans (see collect_spans), into its trace as well.
+    """
+    if not CV_STAGE_TIMING:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, (time.perf_counter() - start) * 1000)
+
+
+def record_span(stage: str, ms: float) -> None:
+    stage_timings.observe(stage, ms)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, ms))
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the spans recorded inside the block (including on the CV pool)."""
+    spans: List[Tuple[str, float]] = []
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Format spans as a Server-Timing header, summing repeated stages."""
+    totals: Dict[str, float] = {}
+    for stage, ms in spans:
+        totals[stage] = totals.get(stage, 0.0) + ms
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in totals.items())
+
+
+def stage_stats() -> dict:
+    return stage_timings.snapshot()
@@ -0,0 +1,64 @@
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+from ultralytics import YOLO
+
+from computer_vision.backends import load_backend_model
+from computer_vision.config import CV_BACKEND, CV_INT8, CV_YOLO_WEIGHTS
+
+# Process-wide cache of loaded models, keyed by weights path
+_models: Dict[str, YOLO] = {}
+_lock = threading.Lock()
+
+# YOLO predictors aren't thread-safe, so calls into one model are serialized.
+# Decoding and ArUco work around the call still run in parallel.
+_inference_locks: Dict[str, threading.Lock] = {}
+
+
+def warmup_model(model: YOLO, imgsz: int = 640) -> None:
+    """Run one inference on a blank frame so the first real request is fast."""
+    blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    model(blank, imgsz=imgsz, verbose=False)
+
+
+def get_model(weights: Optional[str] = None) -> YOLO:
+    """Return the shared, warmed-up YOLO model, loading it on first use."""
+    weights = weights or CV_YOLO_WEIGHTS
+
+    model = _models.get(weights)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have loaded it while we waited for the lock
+        model = _models.get(weights)
+        if model is None:
+            model = load_backend_model(weights)
+            warmup_model(model)
+            _models[weights] = model
+
+    return model
+
+
+def inference_lock(weights: Optional[str] = None) -> threading.Lock:
+    """Return the lock that must be held while running inference on a model."""
+    weights = weights or CV_YOLO_WEIGHTS
+    with _lock:
+        return _inference_locks.setdefault(weights, threading.Lock())
+
+
+def load_model(weights: Optional[str] = None) -> YOLO:
+    """Load the configured model ahead of time (called at app startup)."""
+    model = get_model(weights)
+    print(
+        f"Loaded YOLO model: {weights or CV_YOLO_WEIGHTS} "
+        f"(backend={CV_BACKEND}, int8={CV_INT8})"
+    )
+    return model
+
+
+def clear_models() -> None:
+    """Drop every loaded model (mostly useful for tests)."""
+    with _lock:
+        _models.clear()
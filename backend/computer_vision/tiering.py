@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from computer_vision.config import (
+    CV_MAX_IN_FLIGHT,
+    CV_MODEL_TIERS,
+    CV_TIER_EWMA_ALPHA,
+    CV_TIER_LATENCY_MS,
+    CV_TIER_QUEUE_DEPTH,
+)
+
+
+class DetectionOverloaded(RuntimeError):
+    """Raised when a detection is shed because too many are already in flight."""
+
+
+class ModelTiers:
+    """Picks which YOLO weights serve detections based on current load.
+
+    `tiers` runs from the most accurate model to the fastest one. A detection
+    steps one tier down when more than `max_queue_depth` detections are in
+    flight, or when the moving average of detection latency goes over
+    `max_latency_ms`. It steps back up once there are at most half that many
+    in flight and latency is under 70% of the limit. With `max_in_flight`
+    set, detections beyond that are refused outright (load shedding).
+    """
+
+    def __init__(
+        self,
+        tiers: List[str] = CV_MODEL_TIERS,
+        max_queue_depth: int = CV_TIER_QUEUE_DEPTH,
+        max_latency_ms: float = CV_TIER_LATENCY_MS,
+        alpha: float = CV_TIER_EWMA_ALPHA,
+        max_in_flight: int = CV_MAX_IN_FLIGHT,
+    ):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+
+        self.tiers = list(tiers)
+        self.max_queue_depth = max_queue_depth
+        self.max_latency_ms = max_latency_ms
+        self.alpha = alpha
+        self.max_in_flight = max_in_flight
+
+        self._level = 0
+        self._in_flight = 0
+        self._latency_ewma_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # Stats
+        self._selected: Counter = Counter()
+        self.switches = 0
+        self.shed = 0
+
+    def current(self) -> str:
+        """Weights to serve the next detection with."""
+        with self._lock:
+            weights = self.tiers[self._level]
+            self._selected[weights] += 1
+            return weights
+
+    @contextmanager
+    def track(self, count: int = 1) -> Iterator[None]:
+        """Count `count` detections (e.g. a batch) as in flight and feed the
+        call's latency into the average.
+
+        Raises DetectionOverloaded instead of entering when load shedding is on
+        and they would go over the limit. A batch bigger than the limit is
+        still let through when nothing else is in flight.
+        """
+        with self._lock:
+            over_limit = self._in_flight + count > self.max_in_flight
+            if self.max_in_flight and self._in_flight and over_limit:
+                self.shed += 1
+                raise DetectionOverloaded(
+                    f"{self._in_flight} detections already in flight"
+                )
+            self._in_flight += count
+            self._update_level()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._in_flight -= count
+                if self._latency_ewma_ms is None:
+                    self._latency_ewma_ms = ms
+                else:
+                    self._latency_ewma_ms += self.alpha * (ms - self._latency_ewma_ms)
+                self._update_level()
+
+    def _update_level(self) -> None:
+        """Step one tier down under pressure, one tier up once it's eased off."""
+        ewma = self._latency_ewma_ms or 0.0
+        slow = bool(self.max_latency_ms) and ewma > self.max_latency_ms
+        overloaded = self._in_flight > self.max_queue_depth or slow
+
+        relaxed = self._in_flight <= self.max_queue_depth // 2 and (
+            not self.max_latency_ms or ewma < 0.7 * self.max_latency_ms
+        )
+
+        if overloaded and self._level < len(self.tiers) - 1:
+            self._level += 1
+            self.switches += 1
+        elif relaxed and not overloaded and self._level > 0:
+            self._level -= 1
+            self.switches += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._level = 0
+            self._latency_ewma_ms = None
+            self._selected.clear()
+            self.switches = self.shed = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            ewma = self._latency_ewma_ms
+            return {
+                "tiers": self.tiers,
+                "current": self.tiers[self._level],
+                "in_flight": self._in_flight,
+                "latency_ewma_ms": round(ewma, 1) if ewma is not None else None,
+                "served_by_tier": dict(self._selected),
+                "switches": self.switches,
+                "shed": self.shed,
+            }
+
+
+model_tiers = ModelTiers()
@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from app.models import BoundingBox, CVResult
+from computer_vision.config import (
+    CV_STREAM_CONFIRM_HITS,
+    CV_STREAM_KEYFRAME_INTERVAL,
+    CV_STREAM_MOTION_THRESHOLD,
+)
+
+# Size of the greyscale thumbnail used to measure motion between frames
+THUMBNAIL_SIZE = (64, 48)
+
+
+def frame_thumbnail(image_bytes: bytes) -> Optional[np.ndarray]:
+    """Cheap 1/8-size greyscale decode, shrunk to a fixed-size thumbnail."""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    small = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        return None
+    return cv2.resize(small, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def motion_score(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference between two thumbnails, from 0 to 1."""
+    return float(cv2.absdiff(a, b).mean() / 255)
+
+
+def box_iou(a: BoundingBox, b: BoundingBox) -> float:
+    x_min, y_min = max(a.x_min, b.x_min), max(a.y_min, b.y_min)
+    x_max, y_max = min(a.x_max, b.x_max), min(a.y_max, b.y_max)
+    inter = max(0.0, x_max - x_min) * max(0.0, y_max - y_min)
+    area_a = (a.x_max - a.x_min) * (a.y_max - a.y_min)
+    area_b = (b.x_max - b.x_min) * (b.y_max - b.y_min)
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class Track:
+    """One object followed across keyframes."""
+
+    track_id: int
+    cv_result: CVResult
+    hits: int = 1
+    misses: int = 0
+    confirmed: bool = False
+
+    @property
+    def box(self) -> BoundingBox:
+        return self.cv_result.bounding_boxes[0]
+
+
+@dataclass
+class FrameTracker:
+    """Decides which frames of a stream need YOLO and follows objects between them.
+
+    Full inference only runs on keyframes: the first frame, every
+    `keyframe_interval` frames, whenever the scene has moved more than
+    `motion_threshold` since the last keyframe (the tracker can no longer
+    trust its boxes), or while a new object is waiting to be confirmed.
+    Detections are matched to tracks by class and IoU, and a track is
+    confirmed once it's been seen on `confirm_hits` keyframes.
+    """
+
+    keyframe_interval: int = CV_STREAM_KEYFRAME_INTERVAL
+    motion_threshold: float = CV_STREAM_MOTION_THRESHOLD
+    confirm_hits: int = CV_STREAM_CONFIRM_HITS
+    iou_threshold: float = 0.3
+    max_misses: int = 2
+
+    tracks: List[Track] = field(default_factory=list)
+    frames: int = 0
+    keyframes: int = 0
+    _next_id: int = 1
+    _since_keyframe: int = 0
+    _keyframe_thumb: Optional[np.ndarray] = None
+
+    def needs_inference(self, thumbnail: Optional[np.ndarray]) -> bool:
+        """Call once per frame; True means run detection on this frame."""
+        self.frames += 1
+        self._since_keyframe += 1
+
+        if thumbnail is None:
+            return False
+        if (
+            self._keyframe_thumb is None
+            or self._since_keyframe >= self.keyframe_interval
+        ):
+            return True
+        if any(not track.confirmed for track in self.tracks):
+            return True
+        return motion_score(thumbnail, self._keyframe_thumb) > self.motion_threshold
+
+    def update(self, cv_results: List[CVResult], thumbnail: np.ndarray) -> List[Track]:
+        """Feed a keyframe's detections; returns tracks confirmed by this frame."""
+        self.keyframes += 1
+        self._since_keyframe = 0
+        self._keyframe_thumb = thumbnail
+
+        unmatched = list(self.tracks)
+        newly_confirmed = []
+
+        for cv_result in sorted(
+            cv_results, key=lambda r: r.confidence_score, reverse=True
+        ):
+            box = cv_result.bounding_boxes[0]
+            candidates = [
+                (box_iou(track.box, box), track)
+                for track in unmatched
+                if track.cv_result.class_name == cv_result.class_name
+            ]
+            iou, track = max(candidates, key=lambda c: c[0], default=(0.0, None))
+
+            if track is None or iou < self.iou_threshold:
+                self.tracks.append(Track(self._next_id, cv_result))
+                self._next_id += 1
+                continue
+
+            unmatched.remove(track)
+            track.hits += 1
+            track.misses = 0
+            # keep the most confident view of the object
+            if cv_result.confidence_score >= track.cv_result.confidence_score:
+                track.cv_result = cv_result
+
+        for track in unmatched:
+            track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for track in self.tracks:
+            if not track.confirmed and track.hits >= self.confirm_hits:
+                track.confirmed = True
+                newly_confirmed.append(track)
+
+        return newly_confirmed
@@ -0,0 +1,221 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.models import CVResult
+from computer_vision.cache import DetectionCache, get_detection_cache
+from computer_vision.calibration import calibration_store
+from computer_vision.config import CV_MODEL_TIERS, CV_PROCESS_WORKERS
+from computer_vision.cv import ImageContext, cached_detect, detect_objects_in_context
+from computer_vision.executor import run_in_cv_pool
+from computer_vision.metrics import collect_spans, record_span
+from computer_vision.registry import get_model
+from computer_vision.tiering import model_tiers
+
+
+def _init_worker() -> None:
+    # Each worker process loads and warms up its own models once
+    for weights in CV_MODEL_TIERS:
+        get_model(weights)
+
+
+def _ping() -> bool:
+    return True
+
+
+@contextmanager
+def shared_frame(frame: np.ndarray) -> Iterator[str]:
+    """Copy a decoded frame into a shared memory block and yield its name.
+
+    The block is unlinked when the context exits, so it must outlive the
+    worker call that reads it.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+    try:
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[:] = frame
+        yield shm.name
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def detect_shared_frame(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    scale: float = 1.0,
+    known_px_per_cm: Optional[float] = None,
+    last_good_px_per_cm: Optional[float] = None,
+    weights: Optional[str] = None,
+) -> Tuple[List[CVResult], bool, Optional[float], List[Tuple[str, float]]]:
+    """Worker side: attach to a shared frame and run detection on it.
+
+    Calibration sessions live in the API process, so the worker gets the
+    station's scale passed in and reports back whatever it measured, along
+    with its stage timings.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # YOLO keeps references to its last input, so work on a private copy
+        # and let the mapping close cleanly (no pickling, just one memcpy)
+        frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+    context = ImageContext(img=frame, scale=scale)
+    context.known_px_per_cm = known_px_per_cm
+    context.last_good_px_per_cm = last_good_px_per_cm
+
+    with collect_spans() as spans:
+        cv_results = detect_objects_in_context(context, weights)
+    return cv_results, context.marker_searched, context.measured_px_per_cm, spans
+
+
+class CVProcessPool:
+    """Pool of worker processes that each hold a warm YOLO model.
+
+    The API process decodes the upload and hands the frame over through shared
+    memory; inference, ArUco measurement and CVResult construction all happen
+    in the worker.
+    """
+
+    def __init__(self, workers: int = CV_PROCESS_WORKERS):
+        self.workers = max(1, workers)
+        # spawn rather than fork: forking a process that has torch loaded is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def warm_up(self) -> None:
+        """Start every worker now so the first requests don't pay for model loading."""
+        futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def detect(
+        self, image_bytes: bytes, station_id: Optional[str] = None
+    ) -> List[CVResult]:
+        """Decode an image and run detection on it in a worker process."""
+        # Repeat uploads are answered from the API process's cache
+        context = ImageContext(image_bytes, station_id=station_id)
+        return cached_detect(context, self._detect_in_worker)
+
+    async def detect_async(
+        self, image_bytes: bytes, station_id: Optional[str] = None
+    ) -> List[CVResult]:
+        """Like detect, but wait for the worker process on the event loop.
+
+        Only the cache lookup, decoding and the shared memory handoff take a CV
+        pool thread, so every worker process can be busy at once however few
+        threads that pool has.
+        """
+        context = ImageContext(image_bytes, station_id=station_id)
+        cache = get_detection_cache()
+        key, cv_results, future = await run_in_cv_pool(self._start, context, cache)
+        if cv_results is not None:
+            return cv_results
+
+        cv_results = []
+        if future is not None:
+            cv_results = self._finish(context, await asyncio.wrap_future(future))
+        if cache is not None:
+            cache.put(key, cv_results)
+        return cv_results
+
+    def _start(
+        self, context: ImageContext, cache: Optional[DetectionCache]
+    ) -> Tuple[Optional[str], Optional[List[CVResult]], Optional[Future]]:
+        """Look the image up in the cache, or else hand it to a worker.
+
+        Returns the cache key, the cached results on a hit, and the worker's
+        future on a miss (None if the image didn't decode).
+        """
+        key = None
+        if cache is not None:
+            key = cache.key_for(context)
+            cv_results = cache.get(key)
+            if cv_results is not None:
+                return key, cv_results, None
+        return key, None, self._submit(context)
+
+    def _submit(self, context: ImageContext) -> Optional[Future]:
+        """Copy the decoded frame to shared memory and start a worker on it.
+
+        The block is freed once the worker is done with it, even if the
+        caller has stopped waiting by then.
+        """
+        frame = context.img
+        if frame is None:
+            return None
+
+        calibration_store.prepare(context)
+        stack = ExitStack()
+        try:
+            shm_name = stack.enter_context(shared_frame(frame))
+            future = self._executor.submit(
+                detect_shared_frame,
+                shm_name,
+                frame.shape,
+                frame.dtype.str,
+                context.scale,
+                context.known_px_per_cm,
+                context.last_good_px_per_cm,
+                # load is tracked in this process, so pick the tier here
+                model_tiers.current(),
+            )
+        except BaseException:
+            stack.close()
+            raise
+        future.add_done_callback(lambda _: stack.close())
+        return future
+
+    def _detect_in_worker(self, context: ImageContext) -> List[CVResult]:
+        future = self._submit(context)
+        if future is None:
+            return []
+        return self._finish(context, future.result())
+
+    def _finish(self, context: ImageContext, outcome: tuple) -> List[CVResult]:
+        """API process side of a worker call: record its timings and calibration."""
+        cv_results, searched, measured, spans = outcome
+
+        # the worker's histograms aren't visible here, so record its stages again
+        for stage, ms in spans:
+            record_span(stage, ms)
+
+        context.marker_searched = searched
+        context.measured_px_per_cm = measured
+        calibration_store.update(context)
+        return cv_results
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[CVProcessPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> CVProcessPool:
+    """Return the process-wide CV worker pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CVProcessPool()
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -1,45 +1,194 @@
 import usb.core
 import usb.util
+import os
 import time
 import json
+import threading
+from collections import deque
+from dataclasses import dataclass
 
 # Scale IDs
 VENDOR_ID = 0x0922
 PRODUCT_ID = 0x8009
 
-def get_weight(wait_time=6.0):
-    """Reads weight from DYMO M25 scale and returns average (kg) in JSON format."""
-    
-    # Find scale 
-    dev = usb.core.find(idVendor=VENDOR_ID, idProduct=PRODUCT_ID)
+# Keep the scale open in a background reader instead of opening it per request
+SCALE_READER = os.getenv("SCALE_READER", "0") == "1"
+# Number of recent readings kept by the reader
+SCALE_READER_HISTORY = int(os.getenv("SCALE_READER_HISTORY", "256"))
+# Seconds to wait before reopening the scale after it drops off the bus
+SCALE_RECONNECT_DELAY_S = float(os.getenv("SCALE_RECONNECT_DELAY_S", "1.0"))
+
+# A weight counts as settled after this many stable, non-zero readings in a row
+# that are all within the tolerance (in grams) of each other
+SCALE_STABLE_SAMPLES = int(os.getenv("SCALE_STABLE_SAMPLES", "3"))
+SCALE_STABLE_TOLERANCE_G = float(os.getenv("SCALE_STABLE_TOLERANCE_G", "5"))
+
+
+def decode_packet(data):
+    """Decode a DYMO report into (grams, stable), or None if it's too short."""
+    if len(data) < 6:
+        return None
+    status = data[1]                  # Status byte (bit 2 indicates stability for DYMO)
+    grams = data[4] + 256 * data[5]   # Combine bytes 4 and 5 for weight in grams
+    return grams, status & 0x04 == 0x04
+
+
+class StabilityDetector:
+    """Decides when a run of scale readings has settled.
+
+    Settled means the last `samples` readings were all flagged stable by the
+    scale, non-zero (an empty scale is stable too) and within `tolerance`
+    grams of each other. A reading that doesn't fit starts the run over.
+    """
+
+    def __init__(self, samples=SCALE_STABLE_SAMPLES, tolerance=SCALE_STABLE_TOLERANCE_G):
+        self.samples = samples
+        self.tolerance = tolerance
+        self._window = deque(maxlen=samples)
+
+    def add(self, grams, stable):
+        """Feed one reading; returns True once the weight has settled."""
+        if not stable or grams == 0:
+            self._window.clear()
+            return False
+
+        self._window.append(grams)
+        # drop older readings the new one is too far from, e.g. while the
+        # item is still being put down
+        while max(self._window) - min(self._window) > self.tolerance:
+            self._window.popleft()
+        return self.settled
+
+    @property
+    def settled(self):
+        return len(self._window) == self.samples
+
+    @property
+    def grams(self):
+        """Average of the readings in the current run."""
+        if not self._window:
+            return None
+        return sum(self._window) / len(self._window)
+
+
+class UnknownStation(LookupError):
+    """Raised for a station ID that isn't one of the plugged-in scales."""
+
+
+@dataclass
+class Reading:
+    """One decoded scale report."""
+
+    timestamp: float  # time.monotonic() when it was read
+    grams: int
+    stable: bool
+
+
+def scale_station_id(dev):
+    """Stable ID for a scale: its serial number, or else the USB port it's in."""
+    try:
+        serial = usb.util.get_string(dev, dev.iSerialNumber) if dev.iSerialNumber else None
+    except (usb.core.USBError, ValueError, NotImplementedError):
+        serial = None  # some hubs/backends can't read string descriptors
+    if serial:
+        return serial.strip()
+
+    ports = getattr(dev, "port_numbers", None)
+    if ports:
+        return f"{dev.bus}-{'.'.join(str(port) for port in ports)}"
+    return f"{dev.bus}-{dev.address}"
+
+
+def find_scales():
+    """Every plugged-in scale, by station ID."""
+    devices = usb.core.find(find_all=True, idVendor=VENDOR_ID, idProduct=PRODUCT_ID)
+    return {scale_station_id(dev): dev for dev in devices}
+
+
+def open_scale(station_id=None):
+    """Find a scale and configure it for reading; None if it isn't plugged in.
+
+    Without a station ID this is whichever scale is found first.
+    """
+    if station_id is None:
+        dev = usb.core.find(idVendor=VENDOR_ID, idProduct=PRODUCT_ID)
+    else:
+        dev = find_scales().get(station_id)
     if dev is None:
-        return json.dumps({"error": "Scale not detected"})
+        return None
 
     # Configure device for communication 
     try:
         dev.set_configuration()
     except usb.core.USBError:
-        pass
+        pass  # already configured, e.g. after a reconnect
+    return dev
+
+
+def iter_readings(dev, wait_time=6.0):
+    """Yield a Reading for every report from an opened scale, for `wait_time` s.
+
+    The device is released when the generator finishes or is closed early.
+    """
+    endpoint = dev[0][(0, 0)][0]
+    deadline = time.monotonic() + wait_time
+    try:
+        while time.monotonic() < deadline:
+            try:
+                data = dev.read(endpoint.bEndpointAddress, endpoint.wMaxPacketSize, timeout=1000)
+            except usb.core.USBTimeoutError:
+                continue  # nothing reported within the timeout, keep waiting
+            except usb.core.USBError:
+                time.sleep(0.1)  # Retry briefly after a read error
+                continue
+
+            decoded = decode_packet(data)
+            if decoded is not None:
+                grams, stable = decoded
+                yield Reading(time.monotonic(), grams, stable)
+    finally:
+        usb.util.dispose_resources(dev)
+
+
+def get_weight(
+    wait_time=6.0,
+    samples=SCALE_STABLE_SAMPLES,
+    tolerance=SCALE_STABLE_TOLERANCE_G,
+    station_id=None,
+):
+    """Reads weight from DYMO M25 scale and returns average (kg) in JSON format.
+
+    Returns as soon as the weight has settled (see StabilityDetector), or
+    after `wait_time` seconds at most. `station_id` picks the scale when more
+    than one is plugged in (see find_scales).
+    """
+    
+    dev = open_scale(station_id)
+    if dev is None:
+        return json.dumps({"error": "Scale not detected"})
 
     # Select the first USB endpoint for reading data
     endpoint = dev[0][(0, 0)][0]
 
     print("Place the item on the scale...")
-    time.sleep(2)  # Wait before collecting data for stability
 
-    readings = []            # Stores valid stable readings
+    detector = StabilityDetector(samples, tolerance)
+    readings = []            # Stores valid stable readings, used if it never settles
+    samples_used = 0         # Decoded packets, stable or not
     start_time = time.time() # Start measurement timer
 
-    # Collect data for the specified duration
-    while time.time() - start_time < wait_time:
+    # Collect data until the weight settles, or for at most wait_time seconds
+    while not detector.settled and time.time() - start_time < wait_time:
         try:
             data = dev.read(endpoint.bEndpointAddress, endpoint.wMaxPacketSize, timeout=1000)
-            if len(data) >= 6:
-                status = data[1]                  # Status byte (bit 2 indicates stability for DYMO)
-                grams = data[4] + 256 * data[5]   # Combine bytes 4 and 5 for weight in grams
+            decoded = decode_packet(data)
+            if decoded is not None:
+                grams, stable = decoded
+                samples_used += 1
+                detector.add(grams, stable)
 
                 # Append only stable readings
-                if status & 0x04 == 0x04:
+                if stable:
                     readings.append(grams)
 
         except usb.core.USBError:
@@ -49,21 +198,317 @@ def get_weight(wait_time=6.0):
     # Release device resources after reading
     usb.util.dispose_resources(dev)
 
-    # Handle case where no stable readings were obtained
-    if len(readings) < 1:
-        return json.dumps({"error": "No valid readings"})
+    settle_time = None
+    if detector.settled:
+        settle_time = round(time.time() - start_time, 3)
+        avg_grams = detector.grams
+    else:
+        # Handle case where no stable readings were obtained
+        if len(readings) < 1:
+            return json.dumps({"error": "No valid readings"})
 
-    # Average the last 3 stable readings for smoother output
-    recent_readings = readings[-3:]
-    avg_grams = sum(recent_readings) / len(recent_readings)
+        # Timed out: average the last 3 stable readings for smoother output
+        recent_readings = readings[-3:]
+        avg_grams = sum(recent_readings) / len(recent_readings)
     avg_kg = avg_grams / 1000
 
     # Return final averaged result in kilograms
     return json.dumps({
-        "total_weight_kg": round(avg_kg, 3)
+        "total_weight_kg": round(avg_kg, 3),
+        "settled": detector.settled,
+        "samples_used": samples_used,
+        "settle_time_s": settle_time,
     })
 
 
+class ScaleReader:
+    """Keeps the scale open and decodes its reports on a background thread.
+
+    Readings go into a ring buffer of the last `history` reports, so a weight
+    request only has to look at what's already been read instead of opening
+    the device, waiting for it to settle and polling for seconds. When the
+    scale is unplugged or a read fails, the device is reopened after
+    `reconnect_delay` seconds.
+    """
+
+    def __init__(
+        self,
+        history=SCALE_READER_HISTORY,
+        reconnect_delay=SCALE_RECONNECT_DELAY_S,
+        read_timeout_ms=1000,
+        samples=SCALE_STABLE_SAMPLES,
+        tolerance=SCALE_STABLE_TOLERANCE_G,
+        station_id=None,
+    ):
+        self.station_id = station_id
+        self.reconnect_delay = reconnect_delay
+        self.samples = samples
+        self.tolerance = tolerance
+        self.read_timeout_ms = read_timeout_ms
+
+        self._readings = deque(maxlen=history)
+        self._changed = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.connected = False
+
+        # Stats
+        self.packets = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.last_error = None
+
+    def start(self):
+        with self._changed:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            name = f"scale-reader-{self.station_id}" if self.station_id else "scale-reader"
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._changed:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+            self._changed.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _open(self):
+        try:
+            return open_scale(self.station_id)
+        except usb.core.NoBackendError as e:
+            self._record_error(e)
+            return None
+
+    def _poll(self, dev):
+        """Read reports until the reader is stopped or the device fails."""
+        endpoint = dev[0][(0, 0)][0]
+        while not self._stop_event.is_set():
+            try:
+                data = dev.read(
+                    endpoint.bEndpointAddress,
+                    endpoint.wMaxPacketSize,
+                    timeout=self.read_timeout_ms,
+                )
+            except usb.core.USBTimeoutError:
+                continue  # nothing reported within the timeout, keep waiting
+
+            decoded = decode_packet(data)
+            if decoded is None:
+                continue
+            grams, stable = decoded
+            with self._changed:
+                self._readings.append(Reading(time.monotonic(), grams, stable))
+                self.packets += 1
+                self._changed.notify_all()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            dev = self._open()
+            if dev is not None:
+                with self._changed:
+                    self.connected = True
+                    self.reconnects += 1
+                try:
+                    self._poll(dev)
+                except usb.core.USBError as e:
+                    self._record_error(e)
+                finally:
+                    with self._changed:
+                        self.connected = False
+                    usb.util.dispose_resources(dev)
+            self._stop_event.wait(self.reconnect_delay)
+
+    def _record_error(self, error):
+        with self._changed:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def readings(self):
+        """Copy of the buffered readings, oldest first."""
+        with self._changed:
+            return list(self._readings)
+
+    def follow(self, timeout):
+        """Yield readings as they arrive, for up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            seen = self.packets
+
+        while True:
+            with self._changed:
+                remaining = deadline - time.monotonic()
+                while self.packets == seen and remaining > 0 and not self._stop_event.is_set():
+                    self._changed.wait(remaining)
+                    remaining = deadline - time.monotonic()
+                # more than a whole buffer behind: the oldest are already gone
+                new = min(self.packets - seen, len(self._readings))
+                fresh = list(self._readings)[len(self._readings) - new:]
+                seen = self.packets
+
+            yield from fresh
+            if remaining <= 0 or self._stop_event.is_set():
+                return
+
+    def latest(self):
+        with self._changed:
+            return self._readings[-1] if self._readings else None
+
+    def _settled_grams(self, max_age):
+        """Weight of the latest settled run of fresh readings, if there is one."""
+        detector = StabilityDetector(self.samples, self.tolerance)
+        now = time.monotonic()
+        for reading in self._readings:
+            if now - reading.timestamp <= max_age:
+                detector.add(reading.grams, reading.stable)
+        return detector.grams if detector.settled else None
+
+    def wait_for_weight(self, timeout=6.0, max_age=5.0):
+        """Latest settled weight in kg, waiting up to `timeout` s for one.
+
+        A reading older than `max_age` seconds doesn't count, e.g. the last one
+        read before the scale was unplugged.
+        Returns None if the weight hasn't settled in time.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                grams = self._settled_grams(max_age)
+                if grams is not None:
+                    return round(grams / 1000, 3)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop_event.is_set():
+                    return None
+                self._changed.wait(remaining)
+
+    def stats(self):
+        with self._changed:
+            latest = self._readings[-1] if self._readings else None
+            return {
+                "station_id": self.station_id,
+                "connected": self.connected,
+                "buffered": len(self._readings),
+                "packets": self.packets,
+                "reconnects": self.reconnects,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "latest_grams": latest.grams if latest else None,
+                "latest_stable": latest.stable if latest else None,
+            }
+
+
+class ScalePool:
+    """One lock per scale, so each scale is read by one request at a time
+    while different stations weigh in parallel.
+
+    `None` stands for the default scale, the first station ID in sorted order,
+    so requests with and without a station share one lock for that scale.
+    Locks are only made for plugged-in scales, not for any ID a client sends.
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def stations(self):
+        """Station IDs of the scales plugged in right now."""
+        try:
+            return sorted(find_scales())
+        except usb.core.NoBackendError:
+            return []
+
+    def resolve(self, station_id=None):
+        """The station a request is for: `station_id`, or the default one if None.
+
+        Stays None only when no scale is plugged in. Raises UnknownStation if
+        `station_id` isn't plugged in.
+        """
+        stations = self.stations()
+        if station_id is None:
+            return stations[0] if stations else None
+        if station_id not in stations:
+            raise UnknownStation(station_id)
+        return station_id
+
+    def lock(self, station_id=None):
+        with self._lock:
+            if station_id is not None and station_id in self._locks:
+                return self._locks[station_id]
+        station_id = self.resolve(station_id)
+        with self._lock:
+            if station_id not in self._locks:
+                self._locks[station_id] = threading.Lock()
+            return self._locks[station_id]
+
+    def locked(self, station_id, open_readings):
+        """Readings from `open_readings()`, holding the station's lock while they run.
+
+        `open_readings` is only called once the lock is held, so the device is
+        opened and configured by one request at a time; it may return None if
+        the scale has gone away. The lock is only taken once the first reading
+        is asked for, so a stream that never starts never holds it.
+        """
+        with self.lock(station_id):
+            readings = open_readings()
+            if readings is None:
+                return
+            try:
+                yield from readings
+            finally:
+                readings.close()
+
+
+scale_pool = ScalePool()
+
+_readers = {}
+_reader_lock = threading.Lock()
+
+
+def get_scale_reader(station_id=None):
+    """Return the reader for a station's scale, starting it on first use.
+
+    None if no scale is plugged in; raises UnknownStation for a station that
+    isn't, so readers only ever run for real scales.
+    """
+    with _reader_lock:
+        if station_id is not None and station_id in _readers:
+            return _readers[station_id]
+    station_id = scale_pool.resolve(station_id)
+    if station_id is None:
+        return None
+    with _reader_lock:
+        if station_id not in _readers:
+            _readers[station_id] = ScaleReader(station_id=station_id)
+            _readers[station_id].start()
+        return _readers[station_id]
+
+
+def start_scale_readers():
+    """Start a reader for every plugged-in scale.
+
+    Scales plugged in later get their reader on first use.
+    """
+    for station_id in scale_pool.stations():
+        get_scale_reader(station_id)
+
+
+def scale_reader_stats():
+    with _reader_lock:
+        readers = list(_readers.values())
+    return [reader.stats() for reader in readers]
+
+
+def stop_scale_reader():
+    with _reader_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.stop(timeout=5)
+
+
 if __name__ == "__main__":
     result = get_weight(wait_time=6.0)
     print("Result:", result)
@@ -4,7 +4,23 @@ import json
 import time
 from itertools import cycle, chain
 
-from readscale import get_weight
+import usb.core
+
+from readscale import (
+    Reading,
+    ScalePool,
+    ScaleReader,
+    StabilityDetector,
+    UnknownStation,
+    find_scales,
+    get_scale_reader,
+    get_weight,
+    iter_readings,
+    scale_reader_stats,
+    scale_station_id,
+    start_scale_readers,
+    stop_scale_reader,
+)
 
 
 class TestGetWeight(unittest.TestCase):
@@ -45,17 +61,22 @@ class TestGetWeight(unittest.TestCase):
         stable_data_510 = [0x00, 0x04, 0x00, 0x00, 0xFE, 0x01]  # 510g, stable
         stable_data_520 = [0x00, 0x04, 0x00, 0x00, 0x08, 0x02]  # 520g, stable
         
-        # Provide enough readings to ensure last 3 are [510, 520, 520]
+        # The weight drifts 500 -> 510 -> 520 while the item is put down,
+        # then settles at 520
         # Then cycle the last value to avoid StopIteration
-        reading_sequence = [stable_data_500] * 8 + [stable_data_510, stable_data_520, stable_data_520]
+        reading_sequence = [stable_data_500] * 2 + [stable_data_510] + [stable_data_520] * 3
         mock_dev.read.side_effect = chain(reading_sequence, cycle([stable_data_520]))
         
         result = get_weight(wait_time=6.0)
         result_dict = json.loads(result)
         
-        # Should average last 3 readings: (510 + 520 + 520) / 3 = 516.67g = 0.517kg
+        # Should return as soon as 3 readings in a row agree: 520g = 0.52kg
         self.assertIn("total_weight_kg", result_dict)
-        self.assertAlmostEqual(result_dict["total_weight_kg"], 0.517, places=2)
+        self.assertAlmostEqual(result_dict["total_weight_kg"], 0.52, places=3)
+        self.assertTrue(result_dict["settled"])
+        self.assertEqual(result_dict["samples_used"], 6)
+        self.assertEqual(result_dict["settle_time_s"], 3.5)
+        self.assertEqual(mock_dev.read.call_count, 6)
         
         # Verify device was configured and resources disposed
         mock_dev.set_configuration.assert_called_once()
@@ -272,9 +293,12 @@ class TestGetWeight(unittest.TestCase):
         result = get_weight(wait_time=6.0)
         result_dict = json.loads(result)
         
-        # Should average last 3: (300 + 400 + 500) / 3 = 400g = 0.4kg
+        # Never settles, so after the timeout the last 3 are averaged:
+        # (300 + 400 + 500) / 3 = 400g = 0.4kg
         self.assertIn("total_weight_kg", result_dict)
         self.assertAlmostEqual(result_dict["total_weight_kg"], 0.4, places=3)
+        self.assertFalse(result_dict["settled"])
+        self.assertIsNone(result_dict["settle_time_s"])
 
     @patch('readscale.usb.core.find')
     @patch('readscale.time.sleep')
@@ -311,6 +335,329 @@ class TestGetWeight(unittest.TestCase):
         self.assertIn("total_weight_kg", result_dict)
         self.assertEqual(result_dict["total_weight_kg"], 0.05)
 
+    @patch('readscale.usb.core.find')
+    @patch('readscale.time.sleep')
+    @patch('readscale.time.time')
+    def test_get_weight_ignores_empty_scale(self, mock_time, mock_sleep, mock_find):
+        """Test that a stable zero (nothing on the scale yet) doesn't settle."""
+        mock_dev = MagicMock()
+        mock_endpoint = Mock()
+        mock_endpoint.bEndpointAddress = 0x81
+        mock_endpoint.wMaxPacketSize = 8
+        mock_dev.__getitem__.return_value.__getitem__.return_value.__getitem__.return_value = mock_endpoint
+        mock_find.return_value = mock_dev
+
+        mock_time.side_effect = [i * 0.2 for i in range(30)]
+
+        empty = [0x00, 0x04, 0x00, 0x00, 0x00, 0x00]         # 0g, stable
+        settling = [0x00, 0x00, 0x00, 0x00, 0x2C, 0x01]      # 300g, unstable
+        stable_data = [0x00, 0x04, 0x00, 0x00, 0x2C, 0x01]   # 300g, stable
+        reading_sequence = [empty] * 4 + [settling] * 2
+        mock_dev.read.side_effect = chain(reading_sequence, cycle([stable_data]))
+
+        result_dict = json.loads(get_weight(wait_time=6.0))
+
+        self.assertEqual(result_dict["total_weight_kg"], 0.3)
+        self.assertTrue(result_dict["settled"])
+        self.assertEqual(result_dict["samples_used"], 9)
+
+
+class TestStabilityDetector(unittest.TestCase):
+    """Test cases for deciding when readings have settled."""
+
+    def test_settles_after_consecutive_samples(self):
+        detector = StabilityDetector(samples=3, tolerance=5)
+
+        self.assertFalse(detector.add(500, True))
+        self.assertFalse(detector.add(502, True))
+        self.assertTrue(detector.add(504, True))
+        self.assertEqual(detector.grams, 502)
+
+    def test_reading_outside_tolerance_restarts_run(self):
+        detector = StabilityDetector(samples=3, tolerance=5)
+        detector.add(500, True)
+        detector.add(500, True)
+
+        # the item was nudged: only the new reading is kept
+        self.assertFalse(detector.add(520, True))
+        self.assertFalse(detector.add(521, True))
+        self.assertTrue(detector.add(519, True))
+        self.assertEqual(detector.grams, 520)
+
+    def test_unstable_or_zero_reading_restarts_run(self):
+        detector = StabilityDetector(samples=2, tolerance=5)
+        detector.add(500, True)
+        self.assertFalse(detector.add(500, False))
+        self.assertFalse(detector.add(500, True))
+        self.assertTrue(detector.add(500, True))
+
+        self.assertFalse(detector.add(0, True))
+        self.assertFalse(detector.settled)
+        self.assertIsNone(detector.grams)
+
+
+def make_device(packets):
+    """Mock scale whose reads return `packets` in order, then time out."""
+    mock_dev = MagicMock()
+    mock_endpoint = Mock()
+    mock_endpoint.bEndpointAddress = 0x81
+    mock_endpoint.wMaxPacketSize = 8
+    mock_dev.__getitem__.return_value.__getitem__.return_value.__getitem__.return_value = mock_endpoint
+
+    packets = iter(packets)
+
+    def read(*args, **kwargs):
+        packet = next(packets, None)
+        if packet is None:
+            time.sleep(0.01)
+            raise usb.core.USBTimeoutError("timeout")
+        if isinstance(packet, Exception):
+            raise packet
+        return packet
+
+    mock_dev.read.side_effect = read
+    return mock_dev
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestScaleReader(unittest.TestCase):
+    """Test cases for the background scale reader."""
+
+    def setUp(self):
+        self.reader = ScaleReader(history=8, reconnect_delay=0.01)
+
+    def tearDown(self):
+        self.reader.stop(timeout=2)
+
+    @patch('readscale.usb.util.dispose_resources')
+    @patch('readscale.usb.core.find')
+    def test_readings_are_buffered(self, mock_find, mock_dispose):
+        mock_find.return_value = make_device([
+            [0x00, 0x00, 0x00, 0x00, 0x64, 0x00],  # 100g, unstable
+            [0x00, 0x04, 0x00],                    # short, ignored
+            [0x00, 0x04, 0x00, 0x00, 0xF4, 0x01],  # 500g, stable
+            [0x00, 0x04, 0x00, 0x00, 0xF6, 0x01],  # 502g, stable
+            [0x00, 0x04, 0x00, 0x00, 0xF8, 0x01],  # 504g, stable
+        ])
+
+        self.reader.start()
+        wait_until(lambda: self.reader.packets == 4)
+
+        readings = self.reader.readings()
+        self.assertEqual([r.grams for r in readings], [100, 500, 502, 504])
+        self.assertEqual([r.stable for r in readings], [False, True, True, True])
+        self.assertTrue(self.reader.connected)
+        # average of the settled run, like get_weight
+        self.assertAlmostEqual(self.reader.wait_for_weight(timeout=0), 0.502, places=3)
+        # the device is opened once, not per reading
+        mock_find.assert_called_once_with(idVendor=0x0922, idProduct=0x8009)
+
+    @patch('readscale.usb.util.dispose_resources')
+    @patch('readscale.usb.core.find')
+    def test_reconnects_after_usb_error(self, mock_find, mock_dispose):
+        mock_find.return_value = make_device([
+            usb.core.USBError("device unplugged"),
+        ] + [[0x00, 0x04, 0x00, 0x00, 0xC8, 0x00]] * 3)  # 200g, stable
+
+        self.reader.start()
+        weight = self.reader.wait_for_weight(timeout=2)
+
+        self.assertEqual(weight, 0.2)
+        self.assertEqual(self.reader.errors, 1)
+        self.assertEqual(self.reader.reconnects, 2)
+        mock_dispose.assert_called_once()
+
+    @patch('readscale.usb.core.find')
+    def test_scale_not_detected(self, mock_find):
+        mock_find.return_value = None
+
+        self.reader.start()
+
+        self.assertIsNone(self.reader.wait_for_weight(timeout=0.05))
+        self.assertFalse(self.reader.connected)
+
+    def test_wait_for_weight_needs_fresh_settled_readings(self):
+        now = time.monotonic()
+        for _ in range(3):
+            self.reader._readings.append(Reading(now - 10, 300, True))
+        self.assertIsNone(self.reader.wait_for_weight(timeout=0, max_age=5))
+
+        self.reader._readings.append(Reading(now, 350, False))
+        self.assertIsNone(self.reader.wait_for_weight(timeout=0, max_age=5))
+
+        for _ in range(3):
+            self.reader._readings.append(Reading(now, 400, True))
+        self.assertEqual(self.reader.wait_for_weight(timeout=0, max_age=5), 0.4)
+
+    @patch('readscale.usb.util.dispose_resources')
+    @patch('readscale.usb.core.find')
+    def test_follow_yields_new_readings(self, mock_find, mock_dispose):
+        mock_find.return_value = make_device([[0x00, 0x04, 0x00, 0x00, 0x64, 0x00]] * 3)
+        # read before following, so not part of the stream
+        self.reader._readings.append(Reading(time.monotonic(), 999, True))
+
+        self.reader.start()
+        followed = list(self.reader.follow(timeout=0.3))
+
+        self.assertEqual([r.grams for r in followed], [100, 100, 100])
+
+    def test_ring_buffer_keeps_latest(self):
+        for grams in range(20):
+            self.reader._readings.append(Reading(time.monotonic(), grams, True))
+
+        self.assertEqual([r.grams for r in self.reader.readings()], list(range(12, 20)))
+        self.assertEqual(self.reader.latest().grams, 19)
+
+
+class TestIterReadings(unittest.TestCase):
+    """Test cases for streaming readings from an opened scale."""
+
+    @patch('readscale.usb.util.dispose_resources')
+    def test_yields_readings_and_releases_device(self, mock_dispose):
+        mock_dev = make_device([
+            [0x00, 0x00, 0x00, 0x00, 0x64, 0x00],  # 100g, unstable
+            [0x00, 0x04, 0x00],                    # short, ignored
+            usb.core.USBError("read error"),
+            [0x00, 0x04, 0x00, 0x00, 0xC8, 0x00],  # 200g, stable
+        ])
+
+        readings = iter_readings(mock_dev, wait_time=5)
+        first, second = next(readings), next(readings)
+        readings.close()
+
+        self.assertEqual((first.grams, first.stable), (100, False))
+        self.assertEqual((second.grams, second.stable), (200, True))
+        # closing early still releases the device
+        mock_dispose.assert_called_once_with(mock_dev)
+
+
+def make_usb_device(serial=None, bus=1, port_numbers=(2,)):
+    mock_dev = MagicMock()
+    mock_dev.iSerialNumber = 3 if serial else 0
+    mock_dev.bus = bus
+    mock_dev.port_numbers = port_numbers
+    mock_dev.serial = serial
+    return mock_dev
+
+
+class TestScalePool(unittest.TestCase):
+    """Test cases for finding several scales and sharing them out."""
+
+    @patch('readscale.usb.util.get_string')
+    def test_station_id_from_serial_or_port(self, mock_get_string):
+        mock_get_string.side_effect = lambda dev, index: dev.serial
+
+        self.assertEqual(scale_station_id(make_usb_device(serial="02204A")), "02204A")
+        self.assertEqual(scale_station_id(make_usb_device(bus=3, port_numbers=(1, 4))), "3-1.4")
+
+    @patch('readscale.usb.util.get_string')
+    @patch('readscale.usb.core.find')
+    def test_find_scales(self, mock_find, mock_get_string):
+        mock_get_string.side_effect = lambda dev, index: dev.serial
+        first, second = make_usb_device(serial="A1"), make_usb_device(port_numbers=(5,))
+        mock_find.return_value = iter([first, second])
+
+        scales = find_scales()
+
+        self.assertEqual(scales, {"A1": first, "1-5": second})
+        mock_find.assert_called_once_with(find_all=True, idVendor=0x0922, idProduct=0x8009)
+
+    @patch('readscale.usb.util.dispose_resources')
+    @patch('readscale.time.sleep')
+    @patch('readscale.time.time')
+    @patch('readscale.find_scales')
+    def test_get_weight_from_station(self, mock_find_scales, mock_time, mock_sleep, mock_dispose):
+        stable_data = [0x00, 0x04, 0x00, 0x00, 0xC8, 0x00]  # 200g, stable
+        mock_find_scales.return_value = {"A1": make_device([stable_data] * 3)}
+        mock_time.side_effect = [i * 0.2 for i in range(10)]
+
+        self.assertEqual(json.loads(get_weight(station_id="A1"))["total_weight_kg"], 0.2)
+        self.assertEqual(json.loads(get_weight(station_id="B2")), {"error": "Scale not detected"})
+
+    @patch('readscale.find_scales', return_value={"A1": None, "B2": None})
+    def test_one_lock_per_station(self, mock_find_scales):
+        pool = ScalePool()
+
+        self.assertIs(pool.lock("A1"), pool.lock("A1"))
+        self.assertIsNot(pool.lock("A1"), pool.lock("B2"))
+
+        # holding one station doesn't block another
+        with pool.lock("A1"):
+            self.assertTrue(pool.lock("B2").acquire(blocking=False))
+            pool.lock("B2").release()
+
+    @patch('readscale.find_scales', return_value={"A1": None})
+    def test_locked_readings_hold_the_station(self, mock_find_scales):
+        pool = ScalePool()
+        held = []
+
+        def open_readings():
+            held.append(pool.lock("A1").locked())
+            return (grams for grams in [100, 200])
+
+        readings = pool.locked("A1", open_readings)
+
+        self.assertFalse(pool.lock("A1").locked())  # not started yet
+        self.assertEqual(held, [])
+        self.assertEqual(next(readings), 100)
+        self.assertEqual(held, [True])  # opened under the lock
+        self.assertTrue(pool.lock("A1").locked())
+        readings.close()
+        self.assertFalse(pool.lock("A1").locked())
+
+    @patch('readscale.find_scales', return_value={"A1": None})
+    def test_locked_readings_end_if_scale_is_gone(self, mock_find_scales):
+        pool = ScalePool()
+
+        self.assertEqual(list(pool.locked("A1", lambda: None)), [])
+        self.assertFalse(pool.lock("A1").locked())
+
+    @patch('readscale.find_scales')
+    def test_none_resolves_to_default_station(self, mock_find_scales):
+        pool = ScalePool()
+        mock_find_scales.return_value = {"B2": Mock(), "A1": Mock()}
+
+        self.assertEqual(pool.resolve(None), "A1")
+        self.assertEqual(pool.resolve("B2"), "B2")
+        self.assertIs(pool.lock(None), pool.lock("A1"))
+
+        mock_find_scales.return_value = {}
+        self.assertIsNone(pool.resolve(None))
+
+    @patch('readscale.find_scales', return_value={"A1": None})
+    def test_no_lock_for_unknown_station(self, mock_find_scales):
+        pool = ScalePool()
+
+        with self.assertRaises(UnknownStation):
+            pool.lock("bogus")
+        self.assertNotIn("bogus", pool._locks)
+
+    @patch('readscale.ScaleReader.start')
+    @patch('readscale.find_scales')
+    def test_readers_only_for_plugged_in_scales(self, mock_find_scales, mock_start):
+        self.addCleanup(stop_scale_reader)
+        mock_find_scales.return_value = {}
+
+        start_scale_readers()
+        self.assertIsNone(get_scale_reader())
+        self.assertEqual(scale_reader_stats(), [])  # no reader for "no scale"
+
+        mock_find_scales.return_value = {"A1": None}
+        with self.assertRaises(UnknownStation):
+            get_scale_reader("bogus")
+        reader = get_scale_reader()
+
+        self.assertEqual(reader.station_id, "A1")
+        self.assertIs(get_scale_reader("A1"), reader)
+        self.assertEqual(len(scale_reader_stats()), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+from importlib.util import find_spec
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+
+from computer_vision import backends
+from computer_vision.config import CV_YOLO_WEIGHTS
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class TestBackendSelection(unittest.TestCase):
+    """Test cases for choosing and exporting inference backends."""
+
+    def test_exported_paths(self):
+        self.assertEqual(backends.exported_path("yolov8s.pt", "torch"), "yolov8s.pt")
+        self.assertEqual(backends.exported_path("yolov8s.pt", "onnx"), "yolov8s.onnx")
+        self.assertEqual(
+            backends.exported_path("yolov8s.pt", "onnx", int8=True), "yolov8s-int8.onnx"
+        )
+        self.assertEqual(
+            backends.exported_path("yolov8s.pt", "openvino", int8=True),
+            "yolov8s_int8_openvino_model",
+        )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backends.exported_path("yolov8s.pt", "tensorrt")
+
+    @patch("computer_vision.backends.export_model")
+    def test_torch_never_exports(self, mock_export):
+        self.assertEqual(backends.resolve_weights("yolov8s.pt", "torch"), "yolov8s.pt")
+        mock_export.assert_not_called()
+
+    @patch("computer_vision.backends.export_model")
+    def test_existing_export_reused(self, mock_export):
+        with tempfile.TemporaryDirectory() as tmp:
+            weights = os.path.join(tmp, "yolov8s.pt")
+            Path(tmp, "yolov8s.onnx").touch()
+
+            path = backends.resolve_weights(weights, "onnx")
+
+        self.assertEqual(path, os.path.join(tmp, "yolov8s.onnx"))
+        mock_export.assert_not_called()
+
+    @patch("computer_vision.backends.YOLO")
+    def test_exports_have_dynamic_shapes(self, mock_yolo):
+        """Test that exports accept the smaller resolution tiers and batches."""
+        backends.export_model("yolov8s.pt", "onnx")
+        backends.export_model("yolov8s.pt", "openvino", int8=True)
+
+        self.assertEqual(mock_yolo.return_value.export.call_count, 2)
+        for call in mock_yolo.return_value.export.call_args_list:
+            self.assertTrue(call.kwargs["dynamic"])
+
+    @patch("computer_vision.backends.export_model", return_value="exported.onnx")
+    def test_missing_export_created(self, mock_export):
+        with tempfile.TemporaryDirectory() as tmp:
+            weights = os.path.join(tmp, "yolov8s.pt")
+            path = backends.resolve_weights(weights, "onnx", int8=True)
+
+        self.assertEqual(path, "exported.onnx")
+        mock_export.assert_called_once_with(weights, "onnx", True)
+
+
+@unittest.skipUnless(
+    find_spec("onnxruntime") and os.path.exists(CV_YOLO_WEIGHTS),
+    "needs onnxruntime and local YOLO weights",
+)
+class TestBackendParity(unittest.TestCase):
+    """Check the ONNX backend detects the same objects as PyTorch on sample images."""
+
+    @classmethod
+    def setUpClass(cls):
+        from ultralytics.utils import ASSETS
+
+        cls.images = sorted(str(p) for p in Path(ASSETS).glob("*.jpg"))
+        cls.reference = backends.load_backend_model(CV_YOLO_WEIGHTS, "torch")
+
+    def assert_parity(self, backend, int8, conf_tolerance, iou_threshold):
+        model = backends.load_backend_model(CV_YOLO_WEIGHTS, backend, int8)
+
+        for image in self.images:
+            expected = self.reference(image, conf=0.3, imgsz=640, verbose=False)[0]
+            actual = model(image, conf=0.3, imgsz=640, verbose=False)[0]
+
+            for box, cls, conf in zip(
+                expected.boxes.xyxy.tolist(),
+                expected.boxes.cls.tolist(),
+                expected.boxes.conf.tolist(),
+            ):
+                # every confident reference detection needs a close match
+                if conf < 0.5:
+                    continue
+                matches = [
+                    (box_iou(box, other), abs(conf - other_conf))
+                    for other, other_cls, other_conf in zip(
+                        actual.boxes.xyxy.tolist(),
+                        actual.boxes.cls.tolist(),
+                        actual.boxes.conf.tolist(),
+                    )
+                    if other_cls == cls
+                ]
+                best = max(matches, default=(0.0, 1.0))
+                self.assertGreaterEqual(best[0], iou_threshold, f"{image}: {cls}")
+                self.assertLessEqual(best[1], conf_tolerance, f"{image}: {cls}")
+
+    def test_onnx_matches_torch(self):
+        self.assert_parity("onnx", int8=False, conf_tolerance=0.02, iou_threshold=0.95)
+
+    def test_onnx_int8_close_to_torch(self):
+        self.assert_parity("onnx", int8=True, conf_tolerance=0.15, iou_threshold=0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+from computer_vision.batching import MicroBatcher
+
+
+class FakeDetector:
+    """Stands in for detect_objects_yolo_batch and records each call."""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def __call__(self, images, station_ids):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.calls.append(list(images))
+        return [[image.decode()] for image in images]
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test cases for grouping concurrent detection requests."""
+
+    def tearDown(self):
+        self.batcher.stop(timeout=5)
+
+    def test_requests_within_window_share_a_batch(self):
+        """Test that requests submitted close together run as one model call."""
+        detector = FakeDetector()
+        self.batcher = MicroBatcher(detector, max_batch_size=8, max_wait_ms=200)
+
+        futures = [self.batcher.submit(f"img{i}".encode()) for i in range(3)]
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(results, [["img0"], ["img1"], ["img2"]])
+        self.assertEqual(len(detector.calls), 1)
+        self.assertEqual(self.batcher.stats()["batch_size_histogram"], {3: 1})
+
+    def test_batches_capped_at_max_size(self):
+        """Test that a batch never exceeds max_batch_size."""
+        gate = threading.Event()
+        detector = FakeDetector(gate)
+        self.batcher = MicroBatcher(detector, max_batch_size=2, max_wait_ms=50)
+
+        futures = [self.batcher.submit(f"img{i}".encode()) for i in range(5)]
+        gate.set()
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual([r[0] for r in results], [f"img{i}" for i in range(5)])
+        self.assertTrue(all(len(call) <= 2 for call in detector.calls))
+
+        stats = self.batcher.stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreaterEqual(stats["max_queue_depth"], 1)
+
+    def test_errors_reach_every_caller(self):
+        """Test that a failed model call fails every request in the batch."""
+
+        def broken(images, station_ids):
+            raise RuntimeError("model exploded")
+
+        self.batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=100)
+
+        futures = [self.batcher.submit(b"a"), self.batcher.submit(b"b")]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_stats_before_any_requests(self):
+        """Test that stats are reported before anything has been batched."""
+        self.batcher = MicroBatcher(FakeDetector(), max_batch_size=4, max_wait_ms=5)
+
+        stats = self.batcher.stats()
+        self.assertEqual(stats["batches"], 0)
+        self.assertEqual(stats["avg_batch_size"], 0.0)
+        self.assertEqual(stats["max_batch_size"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+from computer_vision import benchmark
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test cases for the CV benchmark suite and its regression check."""
+
+    def setUp(self):
+        self.corpus = {
+            "small_marker": benchmark.synthetic_image(320, 240, objects=1, seed=0),
+            "small_nomarker": benchmark.synthetic_image(
+                320, 240, objects=0, with_marker=False, seed=1
+            ),
+        }
+
+    def test_synthetic_corpus_covers_every_combination(self):
+        corpus = benchmark.synthetic_corpus()
+        self.assertEqual(len(corpus), 12)
+        self.assertIn("4032x3024_3obj_nomarker", corpus)
+
+    def test_run_suite_reports_each_target(self):
+        report = benchmark.run_suite(
+            self.corpus, ["bytes_to_numpy", "dimensions"], repeat=2
+        )
+
+        self.assertEqual(report["meta"]["images"], 2)
+        for target in ("bytes_to_numpy", "dimensions"):
+            result = report["results"][target]
+            self.assertEqual(result["calls"], 4)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+            self.assertGreater(result["peak_traced_mb"], 0)
+
+    @patch("app.routes.item.detect_objects_yolo", return_value=[])
+    def test_route_target(self, mock_yolo):
+        report = benchmark.run_suite(self.corpus, ["route"], repeat=1)
+
+        self.assertEqual(report["results"]["route"]["calls"], 2)
+        # warm-up + timed pass + memory pass
+        self.assertEqual(mock_yolo.call_count, 5)
+
+    def test_unknown_target(self):
+        with self.assertRaises(ValueError):
+            benchmark.run_suite(self.corpus, ["nope"])
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {
+            "results": {
+                "decode": {"p50_ms": 10.0, "p95_ms": 20.0, "throughput_rps": 100.0}
+            }
+        }
+        current = {
+            "results": {
+                "decode": {"p50_ms": 10.5, "p95_ms": 25.0, "throughput_rps": 80.0}
+            }
+        }
+
+        report = benchmark.compare_reports(baseline, current, threshold=0.1)
+
+        self.assertEqual(report["changes"]["decode"]["p50_ms"], 0.05)
+        self.assertEqual(
+            report["regressions"],
+            ["decode.p95_ms: 20.0 -> 25.0", "decode.throughput_rps: 100.0 -> 80.0"],
+        )
+
+    def test_compare_ignores_improvements(self):
+        baseline = {"results": {"decode": {"p99_ms": 30.0, "throughput_rps": 50.0}}}
+        current = {"results": {"decode": {"p99_ms": 10.0, "throughput_rps": 90.0}}}
+
+        report = benchmark.compare_reports(baseline, current, threshold=0.1)
+
+        self.assertEqual(report["regressions"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
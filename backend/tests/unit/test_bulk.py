@@ -0,0 +1,96 @@
+import io
+import json
+import sys
+import tarfile
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+from app.models import BoundingBox, CVResult, Dimensions
+from computer_vision import bulk
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 20
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 20
+
+
+def make_cv_result(name):
+    return CVResult(
+        item_name=name,
+        class_name=name,
+        confidence_score=0.9,
+        bounding_boxes=[BoundingBox(x_min=0, y_min=0, x_max=10, y_max=20)],
+        dimensions=Dimensions(length=2, width=3),
+    )
+
+
+class TestBulkDetection(unittest.TestCase):
+    """Test cases for the offline bulk detection CLI."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name) / "photos"
+        (self.root / "shelf").mkdir(parents=True)
+        (self.root / "a.jpg").write_bytes(JPEG)
+        (self.root / "shelf" / "b.PNG").write_bytes(PNG)
+        (self.root / "notes.txt").write_text("not an image")
+
+    def test_iter_images_walks_directory(self):
+        images = list(bulk.iter_images(str(self.root)))
+        self.assertEqual(images, [("a.jpg", JPEG), ("shelf/b.PNG", PNG)])
+
+    def test_iter_images_reads_tarball(self):
+        tar_path = Path(self.tmp.name) / "photos.tar.gz"
+        with tarfile.open(tar_path, "w:gz") as tar:
+            tar.add(self.root, arcname="photos")
+
+        names = [name for name, _ in bulk.iter_images(str(tar_path))]
+        self.assertEqual(sorted(names), ["photos/a.jpg", "photos/shelf/b.PNG"])
+
+    @patch("computer_vision.bulk.detect_objects_yolo")
+    def test_run_bulk_writes_ndjson(self, mock_yolo):
+        def detect(image_bytes):
+            if image_bytes == PNG:
+                raise ValueError("bad image")
+            return [make_cv_result("suitcase"), make_cv_result("book")]
+
+        mock_yolo.side_effect = detect
+        out = io.StringIO()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stats = bulk.run_bulk(str(self.root), out, executor, max_pending=1)
+
+        records = {r["source"]: r for r in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual(
+            [r["item_name"] for r in records["a.jpg"]["cv_results"]],
+            ["suitcase", "book"],
+        )
+        self.assertIn("bad image", records["shelf/b.PNG"]["error"])
+        self.assertEqual(stats["images"], 2)
+        self.assertEqual(stats["detections"], 2)
+        self.assertEqual(stats["errors"], 1)
+
+    @patch("computer_vision.bulk.requests.Session")
+    @patch("computer_vision.bulk.detect_objects_yolo")
+    def test_uploads_items_to_api(self, mock_yolo, mock_session):
+        mock_yolo.return_value = [make_cv_result("suitcase")]
+        session = mock_session.return_value
+        uploader = bulk.ItemUploader("http://api:8000/", trip_id="t1")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            bulk.run_bulk(str(self.root), io.StringIO(), executor, 4, uploader)
+
+        self.assertEqual(session.post.call_count, 2)
+        args, kwargs = session.post.call_args
+        self.assertEqual(args[0], "http://api:8000/items/")
+        self.assertEqual(kwargs["params"], {"trip_id": "t1"})
+        self.assertEqual(kwargs["json"]["estimated_volume_cm3"], 6)
+        self.assertEqual(kwargs["json"]["cv_result"]["item_name"], "suitcase")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+import cv2
+import numpy as np
+
+from app.models import BoundingBox, CVResult, Dimensions
+from computer_vision.cache import DetectionCache
+from computer_vision.calibration import Calibration, CalibrationStore
+from computer_vision.cv import ImageContext, cached_detect
+
+
+def make_cv_result(name="suitcase"):
+    return CVResult(
+        item_name=name,
+        class_name=name,
+        confidence_score=0.9,
+        bounding_boxes=[BoundingBox(x_min=0, y_min=0, x_max=10, y_max=20)],
+        dimensions=Dimensions(length=2, width=1),
+    )
+
+
+def make_photo(fmt=".png", quality=95):
+    """Encode a blocky image whose decoded copies hash the same."""
+    blocks = np.random.default_rng(0).integers(0, 256, (8, 9), dtype=np.uint8)
+    grey = cv2.resize(blocks, (180, 160), interpolation=cv2.INTER_NEAREST)
+    img = cv2.cvtColor(grey, cv2.COLOR_GRAY2BGR)
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if fmt == ".jpg" else []
+    _, buffer = cv2.imencode(fmt, img, params)
+    return buffer.tobytes()
+
+
+class TestDetectionCache(unittest.TestCase):
+    """Test cases for the content-addressed detection result cache."""
+
+    def test_repeat_upload_hits_cache(self):
+        """Test that the same bytes only run detection once."""
+        cache = DetectionCache(max_entries=4, ttl_s=60)
+        detect = MagicMock(return_value=[make_cv_result()])
+
+        with patch("computer_vision.cv.get_detection_cache", return_value=cache):
+            first = cached_detect(ImageContext(make_photo()), detect)
+            second = cached_detect(ImageContext(make_photo()), detect)
+
+        detect.assert_called_once()
+        self.assertEqual(first, second)
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted at capacity."""
+        cache = DetectionCache(max_entries=2, ttl_s=60)
+        cache.put("a", [make_cv_result("a")])
+        cache.put("b", [make_cv_result("b")])
+        cache.get("a")
+        cache.put("c", [make_cv_result("c")])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    @patch("computer_vision.cache.time.monotonic")
+    def test_entries_expire(self, mock_time):
+        """Test that entries older than the TTL are treated as misses."""
+        cache = DetectionCache(max_entries=2, ttl_s=10)
+        mock_time.return_value = 100.0
+        cache.put("a", [make_cv_result()])
+
+        mock_time.return_value = 111.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_perceptual_mode_matches_reencoded_copy(self):
+        """Test that a re-encoded copy of a photo hits in perceptual mode."""
+        perceptual = DetectionCache(mode="perceptual")
+        exact = DetectionCache(mode="exact")
+
+        png = ImageContext(make_photo(".png"))
+        jpg = ImageContext(make_photo(".jpg", quality=70))
+
+        self.assertEqual(perceptual.key_for(png), perceptual.key_for(jpg))
+        self.assertNotEqual(exact.key_for(png), exact.key_for(jpg))
+
+    def test_calibration_change_misses_cache(self):
+        """Test that re-calibrating or resetting a station doesn't serve stale sizes."""
+        cache = DetectionCache(max_entries=4, ttl_s=60)
+        store = CalibrationStore()
+        detect = MagicMock(return_value=[make_cv_result()])
+
+        def upload():
+            context = ImageContext(make_photo(), station_id="s1")
+            return cached_detect(context, detect)
+
+        with (
+            patch("computer_vision.cv.get_detection_cache", return_value=cache),
+            patch("computer_vision.cache.calibration_store", store),
+        ):
+            store._sessions["s1"] = Calibration(px_per_cm=10.0, measured_at=0)
+            upload()
+            upload()
+            self.assertEqual(detect.call_count, 1)
+
+            store._sessions["s1"] = Calibration(px_per_cm=12.5, measured_at=0)
+            upload()
+            self.assertEqual(detect.call_count, 2)
+
+            store.reset("s1")
+            upload()
+            self.assertEqual(detect.call_count, 3)
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            DetectionCache(mode="fuzzy")
+
+
+if __name__ == "__main__":
+    unittest.main()
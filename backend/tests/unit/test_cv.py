@@ -1,10 +1,36 @@
+import asyncio
+import threading
 import unittest
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 sys.path.insert(1, str(Path(__file__).parent.parent.parent))
 
+import cv2
+import numpy as np
+from cv2 import aruco
+
 from app.models import BoundingBox
+from computer_vision import cv, registry
+from computer_vision.decode import choose_reduction, decode_image, read_image_size
+from computer_vision.executor import run_in_cv_pool
+from computer_vision.workers import CVProcessPool, detect_shared_frame, shared_frame
+from tests.unit.yolo_fakes import make_yolo_result
+
+
+def make_marker_image(marker_px=100, size=(400, 600), fmt=".png"):
+    """Encode a white image with the ArUco marker in the top-left corner."""
+    aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
+    marker = aruco.generateImageMarker(aruco_dict, cv.MARKER_ID, marker_px)
+    canvas = np.full((size[0], size[1], 3), 255, dtype=np.uint8)
+    canvas[50 : 50 + marker_px, 50 : 50 + marker_px] = marker[..., None]
+    _, buffer = cv2.imencode(fmt, canvas)
+    return buffer.tobytes()
+
+
+YOLO_NAMES = {0: "person", 24: "backpack", 28: "suitcase", 39: "bottle"}
 
 
 class TestBoundingBoxValidation(unittest.TestCase):
@@ -84,6 +110,436 @@ class TestBoundingBoxValidation(unittest.TestCase):
         self.assertEqual(bbox.y_max, 20.0)
 
 
-if __name__ == '__main__':
-    unittest.main()
+class TestModelRegistry(unittest.TestCase):
+    """Test cases for the shared YOLO model registry."""
+
+    def setUp(self):
+        registry.clear_models()
+
+    def tearDown(self):
+        registry.clear_models()
+
+    @patch("computer_vision.registry.load_backend_model")
+    def test_model_loaded_once(self, mock_yolo):
+        """Test that repeated lookups reuse the same model instance."""
+        first = registry.get_model("weights.pt")
+        second = registry.get_model("weights.pt")
+
+        self.assertIs(first, second)
+        mock_yolo.assert_called_once_with("weights.pt")
+
+    @patch("computer_vision.registry.load_backend_model")
+    def test_model_warmed_up_on_load(self, mock_yolo):
+        """Test that a warmup inference runs when the model is loaded."""
+        model = MagicMock()
+        mock_yolo.return_value = model
+
+        registry.load_model("weights.pt")
+
+        model.assert_called_once()
+
+    @patch("computer_vision.registry.load_backend_model")
+    def test_models_keyed_by_weights(self, mock_yolo):
+        """Test that different weights get different model instances."""
+        mock_yolo.side_effect = lambda weights: MagicMock(name=weights)
+
+        small = registry.get_model("small.pt")
+        nano = registry.get_model("nano.pt")
+
+        self.assertIsNot(small, nano)
+        self.assertEqual(mock_yolo.call_count, 2)
+
+
+class TestImageContext(unittest.TestCase):
+    """Test cases for per-image decoding and ArUco scale caching."""
+
+    def test_px_per_cm_from_marker(self):
+        """Test that the marker width is converted to pixels per cm."""
+        context = cv.ImageContext(make_marker_image(marker_px=100))
+        self.assertAlmostEqual(
+            context.px_per_cm, 100 / cv.PHYSICAL_MARKER_CM, delta=0.5
+        )
+
+    def test_px_per_cm_fallback_without_marker(self):
+        """Test that a missing marker falls back to 1 px per cm."""
+        blank = np.full((200, 200, 3), 255, dtype=np.uint8)
+        _, buffer = cv2.imencode(".png", blank)
+        self.assertEqual(cv.ImageContext(buffer.tobytes()).px_per_cm, 1.0)
+
+    def test_decode_and_marker_search_run_once(self):
+        """Test that several dimension lookups share one decode and marker search."""
+        context = cv.ImageContext(make_marker_image())
+        box = BoundingBox(x_min=0, y_min=0, x_max=40, y_max=20)
+
+        with (
+            patch("computer_vision.cv.decode_image", wraps=cv.decode_image) as decode,
+            patch("computer_vision.cv.find_px_per_cm", wraps=cv.find_px_per_cm) as find,
+        ):
+            for _ in range(3):
+                dims = cv.detect_object_dimensions(context, box)
+
+        decode.assert_called_once()
+        find.assert_called_once()
+        self.assertAlmostEqual(dims.width, 2.0, places=1)
+        self.assertAlmostEqual(dims.length, 1.0, places=1)
+
+    def test_dimensions_accept_raw_bytes(self):
+        """Test that detect_object_dimensions still accepts raw image bytes."""
+        box = BoundingBox(x_min=0, y_min=0, x_max=40, y_max=20)
+        dims = cv.detect_object_dimensions(make_marker_image(), box)
+        self.assertAlmostEqual(dims.width, 2.0, places=1)
+
+
+class TestMarkerSearch(unittest.TestCase):
+    """Test cases for the coarse-to-fine ArUco marker search."""
+
+    def make_greyscale(self, marker_px=300, size=(3000, 4000)):
+        img = cv2.imdecode(
+            np.frombuffer(make_marker_image(marker_px, size), np.uint8),
+            cv2.IMREAD_GRAYSCALE,
+        )
+        return img
+
+    def test_matches_full_resolution_search(self):
+        """Test that the coarse-to-fine result equals a full-resolution search."""
+        greyscale = self.make_greyscale()
+        corners = cv.find_marker_corners(greyscale)
+        expected = np.linalg.norm(corners[0] - corners[1]) / cv.PHYSICAL_MARKER_CM
+
+        self.assertAlmostEqual(cv.find_px_per_cm(greyscale), expected, places=3)
+
+    def test_full_resolution_image_not_searched(self):
+        """Test that only the downscaled copy and a small crop are searched."""
+        greyscale = self.make_greyscale()
+        searched = []
+        real = cv.find_marker_corners
+
+        def spy(img):
+            searched.append(img.shape)
+            return real(img)
+
+        with patch("computer_vision.cv.find_marker_corners", side_effect=spy):
+            cv.find_px_per_cm(greyscale)
+
+        self.assertEqual(len(searched), 2)
+        self.assertNotIn(greyscale.shape, searched)
+        self.assertLessEqual(max(searched[0]), cv.CV_ARUCO_COARSE_SIDE)
+
+    def test_small_marker_falls_back_to_full_search(self):
+        """Test that a marker too small for the coarse pass is still found."""
+        greyscale = self.make_greyscale(marker_px=40)
+        self.assertAlmostEqual(
+            cv.find_px_per_cm(greyscale), 40 / cv.PHYSICAL_MARKER_CM, delta=0.5
+        )
+
+    def test_detector_cached_per_thread(self):
+        self.assertIs(cv.get_aruco_detector(), cv.get_aruco_detector())
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(cv.get_aruco_detector()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], cv.get_aruco_detector())
+
+
+class TestReducedDecode(unittest.TestCase):
+    """Test cases for decoding large photos at reduced size."""
+
+    def test_read_image_size(self):
+        """Test that sizes are read from JPEG and PNG headers."""
+        self.assertEqual(read_image_size(make_marker_image(fmt=".png")), (600, 400))
+        self.assertEqual(read_image_size(make_marker_image(fmt=".jpg")), (600, 400))
+        self.assertIsNone(read_image_size(b"not an image"))
+
+    def test_choose_reduction(self):
+        self.assertEqual(choose_reduction((4000, 3000), 1280), 2)
+        self.assertEqual(choose_reduction((12000, 9000), 1280), 8)
+        self.assertEqual(choose_reduction((1920, 1080), 1280), 1)
+        self.assertEqual(choose_reduction(None, 1280), 1)
+
+    def test_large_jpeg_decoded_smaller(self):
+        """Test that a large JPEG is decoded at reduced size with the right scale."""
+        image_bytes = make_marker_image(marker_px=400, size=(3000, 4000), fmt=".jpg")
+
+        img, scale = decode_image(image_bytes, reduced=True, min_side=1000)
+
+        self.assertEqual(img.shape[:2], (750, 1000))
+        self.assertEqual(scale, 4.0)
+
+    def test_dimensions_match_full_decode(self):
+        """Test that px_per_cm and boxes stay in original-pixel units."""
+        image_bytes = make_marker_image(marker_px=400, size=(3000, 4000), fmt=".jpg")
+        box = BoundingBox(x_min=0, y_min=0, x_max=800, y_max=400)
+
+        full = cv.ImageContext(img=decode_image(image_bytes, reduced=False)[0])
+        img, scale = decode_image(image_bytes, min_side=1000)
+        reduced = cv.ImageContext(img=img, scale=scale)
+
+        full_dims = cv.detect_object_dimensions(full, box)
+        reduced_dims = cv.detect_object_dimensions(reduced, box)
+
+        self.assertEqual(reduced.scale, 4.0)
+        self.assertAlmostEqual(reduced.px_per_cm, full.px_per_cm, delta=1.0)
+        self.assertAlmostEqual(reduced_dims.width, full_dims.width, delta=0.2)
+        self.assertAlmostEqual(reduced_dims.width, 10.0, delta=0.2)
+
+    @patch("computer_vision.cv.find_px_per_cm", return_value=None)
+    def test_boxes_mapped_to_original_pixels(self, mock_find):
+        """Test that YOLO boxes from a reduced image are scaled back up."""
+        context = cv.ImageContext(img=np.zeros((100, 100, 3), np.uint8), scale=4.0)
+        result = make_yolo_result([(28, 0.9, (10, 20, 30, 40))])
+
+        cv_results = cv.build_cv_results(result, YOLO_NAMES, context)
+
+        box = cv_results[0].bounding_boxes[0]
+        self.assertEqual(
+            (box.x_min, box.y_min, box.x_max, box.y_max), (40, 80, 120, 160)
+        )
+        # fallback scale is not multiplied up
+        self.assertEqual(cv_results[0].dimensions.width, 80)
+
+
+class TestDetectObjectsYolo(unittest.TestCase):
+    """Test cases for turning YOLO output into CVResults."""
 
+    def setUp(self):
+        # every test reuses the same image, so don't let results leak between them
+        self.cache_patch = patch(
+            "computer_vision.cv.get_detection_cache", return_value=None
+        )
+        self.cache_patch.start()
+
+    def tearDown(self):
+        self.cache_patch.stop()
+
+    @patch("computer_vision.cv.get_model")
+    def test_filters_to_target_classes(self, mock_get_model):
+        """Test that only TARGET_CLASSES detections are returned."""
+        model = MagicMock()
+        model.names = YOLO_NAMES
+        model.return_value = [
+            make_yolo_result(
+                [
+                    (0, 0.9, (0, 0, 10, 10)),
+                    (28, 0.8, (100, 100, 300, 200)),
+                ]
+            )
+        ]
+        mock_get_model.return_value = model
+
+        results = cv.detect_objects_yolo(make_marker_image())
+
+        self.assertEqual([r.class_name for r in results], ["suitcase"])
+        self.assertEqual(results[0].confidence_score, 0.8)
+        self.assertAlmostEqual(results[0].dimensions.width, 10.0, delta=0.5)
+
+    @patch("computer_vision.cv.find_px_per_cm", return_value=2.0)
+    @patch("computer_vision.cv.get_model")
+    def test_marker_searched_once_per_image(self, mock_get_model, mock_find):
+        """Test that several detections in one frame share one marker search."""
+        model = MagicMock()
+        model.names = YOLO_NAMES
+        model.return_value = [
+            make_yolo_result(
+                [
+                    (24, 0.9, (0, 0, 10, 10)),
+                    (28, 0.8, (10, 10, 30, 50)),
+                    (39, 0.7, (20, 20, 40, 40)),
+                ]
+            )
+        ]
+        mock_get_model.return_value = model
+
+        results = cv.detect_objects_yolo(make_marker_image())
+
+        self.assertEqual(len(results), 3)
+        mock_find.assert_called_once()
+        self.assertEqual(results[1].dimensions.width, 10.0)
+
+    @patch("computer_vision.cv.get_model")
+    def test_batch_runs_one_forward_pass(self, mock_get_model):
+        """Test that a batch of images is sent to the model in one call."""
+        model = MagicMock()
+        model.names = YOLO_NAMES
+        model.return_value = [
+            make_yolo_result([(28, 0.8, (100, 100, 300, 200))]),
+            make_yolo_result([(0, 0.9, (0, 0, 10, 10))]),
+        ]
+        mock_get_model.return_value = model
+
+        results = cv.detect_objects_yolo_batch(
+            [make_marker_image(), b"not an image", make_marker_image()]
+        )
+
+        model.assert_called_once()
+        self.assertEqual(len(model.call_args[0][0]), 2)
+        self.assertEqual([len(r) for r in results], [1, 0, 0])
+        self.assertEqual(results[0][0].class_name, "suitcase")
+
+
+class TestAdaptiveResolution(unittest.TestCase):
+    """Test cases for low-resolution first passes with escalation."""
+
+    def setUp(self):
+        patches = [
+            patch("computer_vision.cv.CV_ADAPTIVE_RESOLUTION", True),
+            patch("computer_vision.cv.CV_RESOLUTION_TIERS", [320, 640]),
+            patch("computer_vision.cv.CV_ESCALATION_CONF", 0.5),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        cv.resolution_counters.reset()
+
+    def make_model(self, by_size):
+        """Fake model whose detections depend on the requested imgsz."""
+        model = MagicMock()
+        model.names = YOLO_NAMES
+        model.side_effect = lambda images, conf, imgsz: [
+            make_yolo_result(by_size[imgsz]) for _ in images
+        ]
+        return model
+
+    def test_confident_low_res_pass_skips_escalation(self):
+        model = self.make_model({320: [(28, 0.9, (0, 0, 10, 10))], 640: []})
+
+        results = cv.run_model(model, [np.zeros((4, 4, 3))])
+
+        self.assertEqual(model.call_count, 1)
+        self.assertEqual(model.call_args.kwargs["imgsz"], 320)
+        self.assertEqual(len(results[0].boxes), 1)
+        self.assertEqual(cv.resolution_counters.snapshot(), {"answered_at_320": 1})
+
+    def test_weak_low_res_pass_escalates(self):
+        model = self.make_model(
+            {
+                320: [(28, 0.4, (0, 0, 10, 10)), (0, 0.95, (0, 0, 5, 5))],
+                640: [(28, 0.8, (0, 0, 10, 10))],
+            }
+        )
+
+        results = cv.run_model(model, [np.zeros((4, 4, 3))])
+
+        self.assertEqual([c.kwargs["imgsz"] for c in model.call_args_list], [320, 640])
+        self.assertEqual(results[0].boxes[0].conf.item(), 0.8)
+        self.assertEqual(
+            cv.resolution_counters.snapshot(), {"escalations": 1, "answered_at_640": 1}
+        )
+
+    def test_only_unconfident_images_escalate(self):
+        confident = make_yolo_result([(28, 0.9, (0, 0, 10, 10))])
+        weak = make_yolo_result([])
+        model = MagicMock()
+        model.names = YOLO_NAMES
+        model.side_effect = [[confident, weak], [make_yolo_result([])]]
+
+        results = cv.run_model(model, ["a", "b"])
+
+        self.assertEqual(model.call_args_list[1].args[0], ["b"])
+        self.assertIs(results[0], confident)
+        stats = cv.resolution_counters.snapshot()
+        self.assertEqual(stats["answered_at_320"], 1)
+        self.assertEqual(stats["answered_at_640"], 1)
+
+
+class TestCVPool(unittest.TestCase):
+    """Test cases for running CV work off the event loop."""
+
+    def test_runs_on_worker_thread(self):
+        """Test that pooled work runs outside the event loop's thread."""
+
+        async def main():
+            loop_thread = threading.current_thread().name
+            worker_thread = await run_in_cv_pool(
+                lambda: threading.current_thread().name
+            )
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(main())
+
+        self.assertNotEqual(loop_thread, worker_thread)
+        self.assertTrue(worker_thread.startswith("cv-worker"))
+
+    def test_loop_stays_responsive(self):
+        """Test that other coroutines keep running while CV work is in progress."""
+        release = threading.Event()
+
+        async def main():
+            slow = asyncio.ensure_future(run_in_cv_pool(release.wait, 5))
+            # this only completes if the loop isn't blocked by the slow call
+            await asyncio.sleep(0.01)
+            finished_first = not slow.done()
+            release.set()
+            await slow
+            return finished_first
+
+        self.assertTrue(asyncio.run(main()))
+
+
+class TestSharedFrameHandoff(unittest.TestCase):
+    """Test cases for passing decoded frames to worker processes."""
+
+    @patch("computer_vision.workers.detect_objects_in_context", return_value=[])
+    def test_worker_sees_same_frame(self, mock_detect):
+        """Test that the worker reads back exactly the frame the API process wrote."""
+        frame = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+
+        with shared_frame(frame) as shm_name:
+            detect_shared_frame(shm_name, frame.shape, frame.dtype.str)
+
+        context = mock_detect.call_args[0][0]
+        np.testing.assert_array_equal(context.img, frame)
+
+    def test_shared_block_removed_after_use(self):
+        """Test that the shared memory block is unlinked once the call is done."""
+        from multiprocessing import shared_memory
+
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        with shared_frame(frame) as shm_name:
+            pass
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+
+def thread_pool_standin(max_workers, **kwargs):
+    """Threads in place of worker processes, so the test can patch the worker."""
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+class TestProcessPoolDispatch(unittest.TestCase):
+    """Test cases for awaiting worker processes from the API."""
+
+    @patch("computer_vision.workers.get_detection_cache", return_value=None)
+    @patch("computer_vision.workers.ProcessPoolExecutor", thread_pool_standin)
+    def test_waiting_for_workers_holds_no_cv_thread(self, _):
+        """Test that more workers run at once than the CV pool has threads."""
+        in_worker = threading.Barrier(3, timeout=5)
+        one_thread = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(one_thread.shutdown)
+
+        def detect(context, weights):
+            in_worker.wait()  # breaks unless all three are in a worker at once
+            return []
+
+        async def run_on_one_thread(fn, *args):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(one_thread, fn, *args)
+
+        async def main():
+            return await asyncio.gather(*(pool.detect_async(image) for _ in range(3)))
+
+        pool = CVProcessPool(workers=3)
+        self.addCleanup(pool.shutdown)
+        image = make_marker_image()
+        with (
+            patch("computer_vision.workers.run_in_cv_pool", run_on_one_thread),
+            patch(
+                "computer_vision.workers.detect_objects_in_context", side_effect=detect
+            ),
+        ):
+            self.assertEqual(asyncio.run(main()), [[], [], []])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+from computer_vision import cv
+from computer_vision.debug_images import DebugImageWriter
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+class TestDebugImageWriter(unittest.TestCase):
+    """Test cases for saving debug images off the request path."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, "debug_images")
+
+    def make_writer(self, **kwargs):
+        writer = DebugImageWriter(directory=self.directory, **kwargs)
+        writer.start()
+        return writer
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_writes_content_addressed_files(self):
+        writer = self.make_writer()
+        writer.submit(JPEG)
+        writer.submit(PNG)
+        writer.submit(JPEG)
+        writer.stop(timeout=5)
+
+        files = self.files()
+        self.assertEqual(len(files), 2)
+        self.assertEqual(sorted(f.rsplit(".", 1)[1] for f in files), ["jpg", "png"])
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 2)
+        self.assertEqual(stats["duplicates"], 1)
+
+    def test_submit_copies_released_views(self):
+        writer = self.make_writer()
+        view = memoryview(bytearray(JPEG))
+        writer.submit(view)
+        view.release()
+        writer.stop(timeout=5)
+
+        with open(os.path.join(self.directory, self.files()[0]), "rb") as f:
+            self.assertEqual(f.read(), JPEG)
+
+    def test_count_retention_deletes_oldest(self):
+        writer = self.make_writer(max_files=2)
+        images = [JPEG + bytes([i]) for i in range(4)]
+        for image in images:
+            writer.submit(image)
+        writer.stop(timeout=5)
+
+        self.assertEqual(len(self.files()), 2)
+        self.assertEqual(writer.stats()["evicted"], 2)
+        kept = set()
+        for name in self.files():
+            with open(os.path.join(self.directory, name), "rb") as f:
+                kept.add(f.read())
+        self.assertEqual(kept, set(images[2:]))
+
+    def test_size_retention_covers_existing_files(self):
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, "old.jpg"), "wb") as f:
+            f.write(JPEG)
+
+        writer = self.make_writer(max_bytes=len(JPEG) + 10)
+        writer.submit(PNG)
+        writer.stop(timeout=5)
+
+        self.assertNotIn("old.jpg", self.files())
+        self.assertEqual(len(self.files()), 1)
+
+    @patch("computer_vision.debug_images.random.random", return_value=0.5)
+    def test_sampling(self, mock_random):
+        writer = DebugImageWriter(directory=self.directory, sample_rate=0.25)
+
+        self.assertFalse(writer.submit(JPEG))
+        self.assertEqual(writer.stats()["sampled_out"], 1)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        # not started, so nothing drains the queue
+        writer = DebugImageWriter(directory=self.directory, queue_size=1)
+
+        self.assertTrue(writer.submit(JPEG))
+        self.assertFalse(writer.submit(PNG))
+        self.assertEqual(writer.stats()["dropped"], 1)
+
+    def test_debug_test_image_only_enqueues(self):
+        writer = DebugImageWriter(directory=self.directory)
+        with patch("computer_vision.cv.get_debug_writer", return_value=writer):
+            cv.debug_test_image(JPEG)
+
+        self.assertEqual(writer.stats()["queue_depth"], 1)
+        self.assertFalse(os.path.exists(self.directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,12 @@ sys.path.insert(1, str(Path(__file__).parent.parent.parent))
 
 from app.main import app
 from app.state.db import items_store, trips_store
-from app.models import Item, ItemUpdate, CVResult, BoundingBox, Dimensions
+from app.models import Item, ItemUpdate, CVResult, BoundingBox, Dimensions, Trip
+from app.routes.trip import recalculate_trip_totals
+from hardware.readscale import Reading
+
+# just the JPEG magic bytes, detection itself is mocked
+FAKE_JPEG = b"\xff\xd8\xff fake"
 
 
 class TestItemEndpoints(unittest.TestCase):
@@ -126,6 +131,189 @@ class TestReadWeight(unittest.TestCase):
         response = self.client.post("/items/weight")
         self.assertEqual(response.status_code, 500)
 
+    @patch("hardware.readscale.find_scales", return_value={"SCALE-2": None})
+    @patch("app.routes.item.get_weight")
+    def test_read_weight_from_station(self, mock_get_weight, _):
+        mock_get_weight.return_value = json.dumps({"total_weight_kg": 1.1})
+
+        response = self.client.post("/items/weight?station=SCALE-2")
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_weight.assert_called_once_with(wait_time=6.0, station_id="SCALE-2")
+
+    @patch(
+        "hardware.readscale.find_scales", return_value={"SCALE-2": None, "1-2": None}
+    )
+    @patch("app.routes.item.get_weight")
+    def test_read_weight_defaults_to_first_station(self, mock_get_weight, _):
+        mock_get_weight.return_value = json.dumps({"total_weight_kg": 1.1})
+
+        response = self.client.post("/items/weight")
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_weight.assert_called_once_with(wait_time=6.0, station_id="1-2")
+
+    @patch("hardware.readscale.find_scales", return_value={"SCALE-2": None})
+    @patch("app.routes.item.get_weight")
+    @patch("app.routes.item.get_scale_reader")
+    def test_read_weight_unknown_station(self, mock_get_reader, mock_get_weight, _):
+        for reader in (False, True):
+            with patch("app.routes.item.SCALE_READER", reader):
+                response = self.client.post("/items/weight?station=bogus")
+                self.assertEqual(response.status_code, 404)
+
+                response = self.client.get("/items/weight/stream?station=bogus")
+                self.assertEqual(response.status_code, 404)
+
+        response = self.client.post("/items/weight/jobs?station=bogus")
+        self.assertEqual(response.status_code, 404)
+        # nothing is started or locked for a station that isn't plugged in
+        mock_get_reader.assert_not_called()
+        mock_get_weight.assert_not_called()
+
+    @patch("app.routes.item.scale_pool")
+    def test_list_weight_stations(self, mock_pool):
+        mock_pool.stations.return_value = ["1-2", "SCALE-2"]
+
+        response = self.client.get("/items/weight/stations")
+
+        self.assertEqual(response.json(), {"stations": ["1-2", "SCALE-2"]})
+
+    @patch("app.routes.item.get_weight")
+    @patch("app.routes.item.get_scale_reader")
+    @patch("app.routes.item.SCALE_READER", True)
+    def test_read_weight_uses_scale_reader(self, mock_get_reader, mock_get_weight):
+        mock_get_reader.return_value.wait_for_weight.return_value = 0.42
+
+        response = self.client.post("/items/weight")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["weight_kg"], 0.42)
+        # the device isn't reopened per request
+        mock_get_weight.assert_not_called()
+
+    @patch("app.routes.item.get_scale_reader")
+    @patch("app.routes.item.SCALE_READER", True)
+    def test_read_weight_scale_reader_not_connected(self, mock_get_reader):
+        mock_get_reader.return_value.wait_for_weight.return_value = None
+        mock_get_reader.return_value.connected = False
+
+        response = self.client.post("/items/weight")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["detail"], "Scale not detected")
+
+
+def parse_events(body):
+    """Split a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def scale_readings(readings):
+    """Generator of readings, like the ones the scale hands out."""
+    yield from readings
+
+
+class TestStreamWeight(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        items_store.clear()
+        trips_store.clear()
+
+    def tearDown(self):
+        items_store.clear()
+        trips_store.clear()
+
+    @patch("hardware.readscale.find_scales", return_value={"A1": object()})
+    @patch("app.routes.item.iter_readings")
+    @patch("app.routes.item.open_scale")
+    def test_stream_weight_settles(self, mock_open_scale, mock_iter_readings, _):
+        trips_store["t1"] = Trip(
+            trip_id="t1", destination="Paris", duration_days=5, doing_laundry=False,
+            items=["i1"],
+        )
+        items_store["i1"] = Item(item_id="i1", weight_kg=None, trips=["t1"])
+        mock_iter_readings.return_value = scale_readings(
+            [Reading(0, 120, False)] + [Reading(0, 500, True)] * 4
+        )
+
+        response = self.client.get("/items/weight/stream?item_id=i1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = parse_events(response.text)
+        self.assertEqual([e for e, _ in events], ["reading"] * 4 + ["settled"])
+        self.assertEqual(events[0][1], {"grams": 120, "stable": False})
+        self.assertEqual(events[-1][1]["weight_kg"], 0.5)
+        self.assertEqual(events[-1][1]["item"]["item_id"], "i1")
+        self.assertEqual(items_store["i1"].weight_kg, 0.5)
+        self.assertEqual(trips_store["t1"].total_items_weight, 0.5)
+
+    @patch(
+        "hardware.readscale.find_scales", return_value={"B2": object(), "A1": object()}
+    )
+    @patch("app.routes.item.iter_readings")
+    @patch("app.routes.item.open_scale")
+    def test_stream_weight_opens_default_station_under_lock(
+        self, mock_open_scale, mock_iter_readings, _
+    ):
+        from app.routes.item import scale_pool
+
+        held = []
+
+        def open_scale(station):
+            held.append(scale_pool.lock(station).locked())
+            return object()
+
+        mock_open_scale.side_effect = open_scale
+        mock_iter_readings.return_value = scale_readings([Reading(0, 250, True)] * 3)
+
+        response = self.client.get("/items/weight/stream")
+
+        self.assertEqual(parse_events(response.text)[-1][0], "settled")
+        mock_open_scale.assert_called_once_with("A1")
+        self.assertEqual(held, [True])
+        self.assertFalse(scale_pool.lock("A1").locked())
+
+    @patch("hardware.readscale.find_scales", return_value={"A1": object()})
+    @patch("app.routes.item.iter_readings")
+    @patch("app.routes.item.open_scale")
+    def test_stream_weight_timeout(self, mock_open_scale, mock_iter_readings, _):
+        mock_iter_readings.return_value = scale_readings([Reading(0, 300, False)] * 2)
+
+        response = self.client.get("/items/weight/stream")
+
+        events = parse_events(response.text)
+        self.assertEqual([e for e, _ in events], ["reading", "reading", "timeout"])
+        self.assertEqual(items_store, {})
+
+    @patch("hardware.readscale.find_scales", return_value={})
+    @patch("app.routes.item.open_scale")
+    def test_stream_weight_scale_not_detected(self, mock_open_scale, _):
+        response = self.client.get("/items/weight/stream")
+
+        self.assertEqual(response.status_code, 500)
+        mock_open_scale.assert_not_called()
+
+    @patch("hardware.readscale.find_scales", return_value={"A1": None})
+    @patch("app.routes.item.get_scale_reader")
+    @patch("app.routes.item.SCALE_READER", True)
+    def test_stream_weight_from_scale_reader(self, mock_get_reader, _):
+        mock_get_reader.return_value.follow.return_value = scale_readings(
+            [Reading(0, 250, True)] * 3
+        )
+
+        response = self.client.get("/items/weight/stream?timeout=2")
+
+        events = parse_events(response.text)
+        self.assertEqual(events[-1][0], "settled")
+        self.assertEqual(events[-1][1]["weight_kg"], 0.25)
+        mock_get_reader.return_value.follow.assert_called_once_with(2.0)
+
 
 class TestDetectEndpoint(unittest.TestCase):
     def setUp(self):
@@ -144,7 +332,7 @@ class TestDetectEndpoint(unittest.TestCase):
             dimensions=Dimensions(length=1, width=1)
         )]
 
-        test_image = ("img.jpg", b"fake", "image/jpeg")
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
 
         response = self.client.post("/items/detect", files={"image": test_image})
 
@@ -168,7 +356,7 @@ class TestDetectEndpoint(unittest.TestCase):
             dimensions=Dimensions(length=1, width=1)
         )]
 
-        test_image = ("img.jpg", b"fake", "image/jpeg")
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
         response = self.client.post("/items/detect?item_id=abc", files={"image": test_image})
 
         self.assertEqual(response.status_code, 200)
@@ -178,7 +366,7 @@ class TestDetectEndpoint(unittest.TestCase):
     def test_detect_invalid_yolo_output(self, mock_yolo):
         mock_yolo.return_value = None
 
-        test_image = ("img.png", b"fake", "image/png")
+        test_image = ("img.png", FAKE_JPEG, "image/png")
         response = self.client.post("/items/detect", files={"image": test_image})
 
         self.assertEqual(response.status_code, 500)
@@ -188,12 +376,170 @@ class TestDetectEndpoint(unittest.TestCase):
     def test_detect_empty_yolo_output(self, mock_yolo):
         mock_yolo.return_value = []
 
-        test_image = ("img.png", b"fake", "image/png")
+        test_image = ("img.png", FAKE_JPEG, "image/png")
         response = self.client.post("/items/detect", files={"image": test_image})
 
         self.assertEqual(response.status_code, 500)
         self.assertIn("Invalid YOLO output", response.text)
 
+    @patch("app.routes.item.CV_MICRO_BATCHING", True)
+    @patch("app.routes.item.get_batcher")
+    def test_detect_uses_micro_batcher(self, mock_get_batcher):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result([CVResult(
+            item_name="Bottle",
+            class_name="bottle",
+            confidence_score=0.7,
+            bounding_boxes=[BoundingBox(x_min=0, y_min=0, x_max=10, y_max=10)],
+            dimensions=Dimensions(length=1, width=1)
+        )])
+        submitted = []
+        mock_get_batcher.return_value.submit.side_effect = (
+            lambda image_bytes, station_id: submitted.append(
+                (bytes(image_bytes), station_id)
+            ) or future
+        )
+
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
+        response = self.client.post("/items/detect", files={"image": test_image})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["cv_result"]["item_name"], "Bottle")
+        self.assertEqual(submitted, [(FAKE_JPEG, None)])
+
+    @patch("app.routes.item.CV_MICRO_BATCHING", False)
+    def test_detect_stats_without_batching(self):
+        response = self.client.get("/items/detect/stats")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["micro_batching"])
+
+
+class TestDetectAllEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        items_store.clear()
+        trips_store.clear()
+
+    def make_cv_result(self, name, length, width):
+        return CVResult(
+            item_name=name,
+            class_name=name,
+            confidence_score=0.9,
+            bounding_boxes=[BoundingBox(x_min=0, y_min=0, x_max=10, y_max=20)],
+            dimensions=Dimensions(length=length, width=width)
+        )
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_detect_all_creates_item_per_detection(self, mock_yolo):
+        mock_yolo.return_value = [
+            self.make_cv_result("suitcase", 2, 3),
+            self.make_cv_result("bottle", 1, 1),
+            self.make_cv_result("book", 4, 5),
+        ]
+
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
+        response = self.client.post("/items/detect/all", files={"image": test_image})
+
+        self.assertEqual(response.status_code, 200)
+        names = [i["cv_result"]["item_name"] for i in response.json()]
+        self.assertEqual(names, ["suitcase", "bottle", "book"])
+        self.assertEqual(len(items_store), 3)
+        mock_yolo.assert_called_once()
+
+    @patch("app.routes.item.recalculate_trip_totals", wraps=recalculate_trip_totals)
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_detect_all_attaches_to_trip(self, mock_yolo, mock_recalc):
+        from app.models import Trip
+
+        trips_store["t1"] = Trip(
+            trip_id="t1", destination="Paris", duration_days=5, doing_laundry=False
+        )
+        mock_yolo.return_value = [
+            self.make_cv_result("suitcase", 2, 3),
+            self.make_cv_result("bottle", 1, 1),
+        ]
+
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
+        response = self.client.post(
+            "/items/detect/all?trip_id=t1", files={"image": test_image}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        ids = [i["item_id"] for i in response.json()]
+        self.assertEqual(trips_store["t1"].items, ids)
+        self.assertTrue(all(items_store[i].trips == ["t1"] for i in ids))
+        self.assertEqual(trips_store["t1"].total_items_volume, 7)
+        # totals recalculated once, not once per item
+        mock_recalc.assert_called_once_with("t1")
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_detect_all_unknown_trip(self, mock_yolo):
+        test_image = ("img.jpg", FAKE_JPEG, "image/jpeg")
+        response = self.client.post(
+            "/items/detect/all?trip_id=missing", files={"image": test_image}
+        )
+
+        self.assertEqual(response.status_code, 404)
+        mock_yolo.assert_not_called()
+
+
+class TestDetectBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        items_store.clear()
+        trips_store.clear()
+
+    def make_cv_result(self, name):
+        return CVResult(
+            item_name=name,
+            class_name=name,
+            confidence_score=0.9,
+            bounding_boxes=[BoundingBox(x_min=0, y_min=0, x_max=10, y_max=20)],
+            dimensions=Dimensions(length=2, width=3)
+        )
+
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_detect_batch_creates_item_per_image(self, mock_batch):
+        mock_batch.return_value = [
+            [self.make_cv_result("suitcase")],
+            [],
+            [self.make_cv_result("bottle"), self.make_cv_result("book")],
+        ]
+
+        files = [("images", (f"img{i}.jpg", FAKE_JPEG, "image/jpeg")) for i in range(3)]
+        response = self.client.post("/items/detect/batch", files=files)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([i["cv_result"]["item_name"] for i in data], ["suitcase", "bottle"])
+        self.assertEqual(data[0]["estimated_volume_cm3"], 6)
+        self.assertEqual(len(items_store), 2)
+        # one batched call for all uploaded images
+        mock_batch.assert_called_once()
+        self.assertEqual(len(mock_batch.call_args[0][0]), 3)
+
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_detect_batch_nothing_detected(self, mock_batch):
+        mock_batch.return_value = [[], []]
+
+        files = [("images", (f"img{i}.jpg", FAKE_JPEG, "image/jpeg")) for i in range(2)]
+        response = self.client.post("/items/detect/batch", files=files)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Invalid YOLO output", response.text)
+
+    @patch("app.routes.item.CV_MAX_BATCH_IMAGES", 2)
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_detect_batch_too_many_images(self, mock_batch):
+        files = [("images", (f"img{i}.jpg", FAKE_JPEG, "image/jpeg")) for i in range(3)]
+        response = self.client.post("/items/detect/batch", files=files)
+
+        self.assertEqual(response.status_code, 400)
+        mock_batch.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+import cv2
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.tracing import ServerTimingMiddleware
+from computer_vision import cv
+from computer_vision.executor import run_in_cv_pool
+from computer_vision.metrics import (
+    Histogram,
+    collect_spans,
+    server_timing,
+    stage_timings,
+    timed,
+)
+from tests.unit.yolo_fakes import make_yolo_model
+
+
+class TestHistogram(unittest.TestCase):
+    """Test cases for the fixed-bucket latency histogram."""
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for ms in [0.3] * 90 + [15] * 9 + [7000]:
+            histogram.observe(ms)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["p50_ms"], 0.5)
+        self.assertEqual(snapshot["p95_ms"], 20)
+        self.assertEqual(snapshot["p99_ms"], 20)
+        # the overflow bucket reports the largest value seen
+        self.assertEqual(histogram.percentile(1.0), 7000)
+        self.assertEqual(snapshot["buckets"]["+inf"], 1)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().snapshot()["p99_ms"], 0.0)
+
+
+class TestStageTiming(unittest.TestCase):
+    """Test cases for per-stage timings and request traces."""
+
+    def setUp(self):
+        stage_timings.reset()
+
+    def test_timed_records_histogram_and_span(self):
+        with collect_spans() as spans:
+            with timed("decode"):
+                pass
+
+        self.assertEqual([stage for stage, _ in spans], ["decode"])
+        self.assertEqual(stage_timings.snapshot()["decode"]["count"], 1)
+
+    def test_no_spans_outside_collection(self):
+        with timed("decode"):
+            pass
+        with collect_spans() as spans:
+            pass
+        self.assertEqual(spans, [])
+
+    def test_server_timing_sums_repeated_stages(self):
+        header = server_timing(
+            [("decode", 1.0), ("postprocess", 0.25), ("postprocess", 0.5)]
+        )
+        self.assertEqual(header, "decode;dur=1.00, postprocess;dur=0.75")
+
+    def test_spans_follow_work_onto_cv_pool(self):
+        def work():
+            with timed("inference"):
+                pass
+
+        async def request():
+            with collect_spans() as spans:
+                await run_in_cv_pool(work)
+            return spans
+
+        spans = asyncio.run(request())
+        self.assertEqual([stage for stage, _ in spans], ["inference"])
+
+    @patch("computer_vision.cv.get_detection_cache", return_value=None)
+    @patch("computer_vision.cv.find_px_per_cm", return_value=10.0)
+    @patch("computer_vision.cv.get_model")
+    def test_detection_stages(self, mock_get_model, mock_find, mock_cache):
+        mock_get_model.return_value = make_yolo_model()
+        image = cv2.imencode(".png", np.zeros((100, 100, 3), np.uint8))[1].tobytes()
+
+        with collect_spans() as spans:
+            cv.detect_objects_yolo(image)
+
+        self.assertEqual(
+            [stage for stage, _ in spans],
+            [
+                "model",
+                "decode",
+                "inference_wait",
+                "inference",
+                "postprocess",
+                "greyscale",
+                "aruco",
+                "cv_result",
+            ],
+        )
+
+
+class TestServerTimingMiddleware(unittest.TestCase):
+    """Test cases for the Server-Timing response header."""
+
+    def setUp(self):
+        app = FastAPI()
+        app.add_middleware(ServerTimingMiddleware)
+
+        @app.get("/timed")
+        async def timed_route():
+            with timed("decode"):
+                pass
+            return {}
+
+        @app.get("/plain")
+        async def plain_route():
+            return {}
+
+        self.client = TestClient(app)
+
+    def test_header_lists_stages(self):
+        response = self.client.get("/timed")
+        self.assertRegex(response.headers["Server-Timing"], r"^decode;dur=\d+\.\d\d$")
+
+    def test_no_header_without_stages(self):
+        self.assertNotIn("Server-Timing", self.client.get("/plain").headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
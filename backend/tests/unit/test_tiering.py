@@ -0,0 +1,178 @@
+import sys
+import unittest
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from computer_vision import cv
+from computer_vision.tiering import DetectionOverloaded, ModelTiers
+from tests.unit.yolo_fakes import make_yolo_model
+
+
+class TestModelTiers(unittest.TestCase):
+    """Test cases for switching model tiers under load."""
+
+    def test_steps_down_when_queue_is_deep(self):
+        tiers = ModelTiers(["s.pt", "n.pt"], max_queue_depth=2)
+
+        with ExitStack() as stack:
+            for _ in range(2):
+                stack.enter_context(tiers.track())
+            self.assertEqual(tiers.current(), "s.pt")
+
+            stack.enter_context(tiers.track())
+            self.assertEqual(tiers.current(), "n.pt")
+
+        # back up once the queue has drained
+        self.assertEqual(tiers.current(), "s.pt")
+        self.assertEqual(tiers.stats()["switches"], 2)
+        self.assertEqual(tiers.stats()["served_by_tier"], {"s.pt": 2, "n.pt": 1})
+
+    def test_never_steps_past_the_last_tier(self):
+        tiers = ModelTiers(["s.pt", "n.pt"], max_queue_depth=0)
+
+        with tiers.track(), tiers.track(), tiers.track():
+            self.assertEqual(tiers.current(), "n.pt")
+
+    @patch("computer_vision.tiering.time.perf_counter")
+    def test_steps_down_when_latency_is_high(self, mock_clock):
+        tiers = ModelTiers(["s.pt", "n.pt"], max_queue_depth=10, max_latency_ms=100)
+
+        # one detection taking 500ms
+        mock_clock.side_effect = [0.0, 0.5]
+        with tiers.track():
+            pass
+        self.assertEqual(tiers.current(), "n.pt")
+        self.assertEqual(tiers.stats()["latency_ewma_ms"], 500)
+
+    @patch("computer_vision.tiering.time.perf_counter")
+    def test_steps_up_once_latency_recovers(self, mock_clock):
+        tiers = ModelTiers(
+            ["s.pt", "n.pt"], max_queue_depth=10, max_latency_ms=100, alpha=0.5
+        )
+        # one 500ms detection, then 10ms ones
+        mock_clock.side_effect = [0.0, 0.5] + [0.0, 0.01] * 4
+
+        with tiers.track():
+            pass
+        self.assertEqual(tiers.current(), "n.pt")
+
+        # average goes 255 -> 132.5 -> 71.25, still above 70% of the limit
+        for _ in range(3):
+            with tiers.track():
+                pass
+        self.assertEqual(tiers.current(), "n.pt")
+
+        # 40.6ms
+        with tiers.track():
+            pass
+        self.assertEqual(tiers.current(), "s.pt")
+
+    def test_sheds_beyond_max_in_flight(self):
+        tiers = ModelTiers(["s.pt"], max_in_flight=1)
+
+        with tiers.track():
+            with self.assertRaises(DetectionOverloaded):
+                with tiers.track():
+                    pass
+
+        self.assertEqual(tiers.stats()["shed"], 1)
+        self.assertEqual(tiers.stats()["in_flight"], 0)
+
+    def test_batch_counts_each_image(self):
+        tiers = ModelTiers(["s.pt", "n.pt"], max_queue_depth=2, max_in_flight=4)
+
+        with tiers.track(3):
+            self.assertEqual(tiers.stats()["in_flight"], 3)
+            self.assertEqual(tiers.current(), "n.pt")
+            # one more image fits, a second batch doesn't
+            with self.assertRaises(DetectionOverloaded):
+                with tiers.track(2):
+                    pass
+            with tiers.track():
+                pass
+
+        # a batch bigger than the limit still runs on an idle server
+        with tiers.track(5):
+            self.assertEqual(tiers.stats()["in_flight"], 5)
+        self.assertEqual(tiers.stats()["in_flight"], 0)
+        self.assertEqual(tiers.stats()["shed"], 1)
+
+    def test_requires_a_tier(self):
+        with self.assertRaises(ValueError):
+            ModelTiers([])
+
+
+class TestTieredDetection(unittest.TestCase):
+    """Test cases for serving detections from the selected tier."""
+
+    @patch("computer_vision.cv.model_tiers", ModelTiers(["n.pt"]))
+    @patch("computer_vision.cv.get_model")
+    def test_result_reports_serving_tier(self, mock_get_model):
+        mock_get_model.return_value = make_yolo_model()
+        context = cv.ImageContext(img=np.zeros((100, 100, 3), np.uint8))
+        context.known_px_per_cm = 10.0
+
+        cv_results = cv.detect_objects_in_context(context)
+
+        mock_get_model.assert_called_once_with("n.pt")
+        self.assertEqual(cv_results[0].model, "n.pt")
+
+    @patch("app.routes.item.model_tiers", ModelTiers(["s.pt"], max_in_flight=1))
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_route_sheds_with_503(self, mock_yolo):
+        from app.routes import item
+
+        client = TestClient(app)
+        test_image = ("img.jpg", b"\xff\xd8\xff fake", "image/jpeg")
+
+        with item.model_tiers.track():
+            response = client.post("/items/detect", files={"image": test_image})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        mock_yolo.assert_not_called()
+
+    @patch("app.routes.item.model_tiers", ModelTiers(["s.pt"], max_in_flight=3))
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_batch_route_sheds_with_503(self, mock_batch):
+        from app.routes import item
+
+        client = TestClient(app)
+        # one detection in flight plus three images goes over the limit
+        files = [("images", ("img.jpg", b"\xff\xd8\xff fake", "image/jpeg"))] * 3
+
+        with item.model_tiers.track():
+            response = client.post("/items/detect/batch", files=files)
+
+        self.assertEqual(response.status_code, 503)
+        mock_batch.assert_not_called()
+
+    @patch("app.routes.item.model_tiers", ModelTiers(["s.pt"]))
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_batch_route_counts_towards_load(self, mock_batch):
+        from app.routes import item
+
+        in_flight = []
+        mock_batch.side_effect = lambda images, station_ids: (
+            in_flight.append(item.model_tiers.stats()["in_flight"]) or [[], []]
+        )
+        client = TestClient(app)
+        files = [("images", ("img.jpg", b"\xff\xd8\xff fake", "image/jpeg"))] * 2
+
+        response = client.post("/items/detect/batch", files=files)
+
+        # nothing detected, but each image was counted while the batch ran
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(in_flight, [2])
+        self.assertEqual(item.model_tiers.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
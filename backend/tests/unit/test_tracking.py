@@ -0,0 +1,194 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+import cv2
+import numpy as np
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+from app.models import BoundingBox, CVResult, Dimensions, Trip
+from app.state.db import items_store, trips_store
+from computer_vision.tracking import FrameTracker, box_iou, frame_thumbnail
+
+
+def make_cv_result(name, x=0, confidence=0.9):
+    return CVResult(
+        item_name=name,
+        class_name=name,
+        confidence_score=confidence,
+        bounding_boxes=[BoundingBox(x_min=x, y_min=0, x_max=x + 100, y_max=50)],
+        dimensions=Dimensions(length=2, width=3),
+    )
+
+
+def make_frame(shift=0):
+    """JPEG of a white square on black, moved right by `shift` pixels."""
+    img = np.zeros((480, 640, 3), np.uint8)
+    cv2.rectangle(img, (100 + shift, 100), (300 + shift, 300), (255, 255, 255), -1)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+class TestFrameTracker(unittest.TestCase):
+    """Test cases for keyframe selection and track confirmation."""
+
+    def setUp(self):
+        self.still = frame_thumbnail(make_frame())
+        self.moved = frame_thumbnail(make_frame(shift=200))
+
+    def test_box_iou(self):
+        a = make_cv_result("book").bounding_boxes[0]
+        b = make_cv_result("book", x=50).bounding_boxes[0]
+        self.assertAlmostEqual(box_iou(a, a), 1.0)
+        self.assertAlmostEqual(box_iou(a, b), 1 / 3)
+
+    def test_first_frame_is_keyframe(self):
+        tracker = FrameTracker()
+        self.assertTrue(tracker.needs_inference(self.still))
+
+    def test_still_frames_skip_inference(self):
+        tracker = FrameTracker(keyframe_interval=5)
+        tracker.needs_inference(self.still)
+        tracker.update([], self.still)
+
+        skipped = [tracker.needs_inference(self.still) for _ in range(4)]
+
+        self.assertEqual(skipped, [False] * 4)
+        # interval reached
+        self.assertTrue(tracker.needs_inference(self.still))
+
+    def test_motion_triggers_keyframe(self):
+        tracker = FrameTracker(keyframe_interval=100)
+        tracker.needs_inference(self.still)
+        tracker.update([], self.still)
+
+        self.assertTrue(tracker.needs_inference(self.moved))
+
+    def test_undecodable_frame_is_skipped(self):
+        tracker = FrameTracker()
+        self.assertFalse(tracker.needs_inference(None))
+
+    def test_track_confirmed_after_hits(self):
+        tracker = FrameTracker(confirm_hits=2)
+
+        self.assertEqual(tracker.update([make_cv_result("book")], self.still), [])
+        # a new, unconfirmed track forces the next frame to be a keyframe
+        self.assertTrue(tracker.needs_inference(self.still))
+
+        confirmed = tracker.update(
+            [make_cv_result("book", x=10, confidence=0.95)], self.still
+        )
+
+        self.assertEqual(len(confirmed), 1)
+        self.assertEqual(confirmed[0].hits, 2)
+        # keeps the most confident detection
+        self.assertEqual(confirmed[0].cv_result.confidence_score, 0.95)
+        # confirmed tracks are only reported once
+        self.assertEqual(tracker.update([make_cv_result("book")], self.still), [])
+
+    def test_different_class_starts_new_track(self):
+        tracker = FrameTracker(confirm_hits=2)
+        tracker.update([make_cv_result("book")], self.still)
+
+        confirmed = tracker.update([make_cv_result("bottle")], self.still)
+
+        self.assertEqual(confirmed, [])
+        self.assertEqual(len(tracker.tracks), 2)
+
+    def test_lost_tracks_are_dropped(self):
+        tracker = FrameTracker(max_misses=1)
+        tracker.update([make_cv_result("book")], self.still)
+
+        tracker.update([], self.still)
+        self.assertEqual(len(tracker.tracks), 1)
+        tracker.update([], self.still)
+        self.assertEqual(tracker.tracks, [])
+
+
+class TestDetectStreamEndpoint(unittest.TestCase):
+    """Test cases for the /items/detect/stream WebSocket."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        items_store.clear()
+        trips_store.clear()
+
+    def tearDown(self):
+        items_store.clear()
+        trips_store.clear()
+
+    def stream(self, frames, query=""):
+        """Send frames, then "end", and return every event until the socket closes."""
+        events = []
+        with self.client.websocket_connect("/items/detect/stream" + query) as ws:
+            for frame in frames:
+                ws.send_bytes(frame)
+            ws.send_text("end")
+            while not events or events[-1]["event"] != "done":
+                events.append(ws.receive_json())
+        return events
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_stream_confirms_items_and_skips_frames(self, mock_yolo):
+        mock_yolo.return_value = [
+            make_cv_result("suitcase"),
+            make_cv_result("book", x=300),
+        ]
+
+        events = self.stream([make_frame()] * 8)
+
+        item_events = [e for e in events if e["event"] == "item"]
+        self.assertEqual(
+            [e["item"]["cv_result"]["item_name"] for e in item_events],
+            ["suitcase", "book"],
+        )
+        # confirmed on the second keyframe
+        self.assertTrue(all(e["frame"] == 2 for e in item_events))
+        self.assertEqual(len(items_store), 2)
+
+        done = events[-1]
+        self.assertEqual(done["frames"], 8)
+        self.assertEqual(done["items"], 2)
+        # the still frames after confirmation never reach YOLO
+        self.assertEqual(done["keyframes"], 2)
+        self.assertEqual(mock_yolo.call_count, 2)
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_stream_attaches_items_to_trip(self, mock_yolo):
+        trips_store["t1"] = Trip(
+            trip_id="t1", destination="Paris", duration_days=5, doing_laundry=False
+        )
+        mock_yolo.return_value = [make_cv_result("suitcase")]
+
+        events = self.stream([make_frame()] * 3, "?trip_id=t1")
+
+        item_id = next(e["item"]["item_id"] for e in events if e["event"] == "item")
+        self.assertEqual(trips_store["t1"].items, [item_id])
+        self.assertEqual(items_store[item_id].trips, ["t1"])
+        self.assertEqual(trips_store["t1"].total_items_volume, 6)
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_stream_unknown_trip(self, mock_yolo):
+        with self.assertRaises(WebSocketDisconnect) as ctx:
+            with self.client.websocket_connect("/items/detect/stream?trip_id=missing"):
+                pass
+
+        self.assertEqual(ctx.exception.code, 1008)
+        mock_yolo.assert_not_called()
+
+    @patch("app.routes.item.CV_STREAM_MAX_FRAME_BYTES", 10)
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_stream_frame_too_large(self, mock_yolo):
+        events = self.stream([make_frame()])
+
+        self.assertEqual([e["event"] for e in events], ["error", "done"])
+        self.assertEqual(events[-1]["frames"], 0)
+        mock_yolo.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.uploads import image_upload
+from computer_vision.decode import sniff_image_format
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+def make_upload(data, spool_max_size=1024):
+    """UploadFile backed by a SpooledTemporaryFile, the way Starlette builds them."""
+    spooled = SpooledTemporaryFile(max_size=spool_max_size)
+    spooled.write(data)
+    spooled.seek(0)
+    return UploadFile(spooled, size=len(data), filename="img")
+
+
+class TestImageUpload(unittest.TestCase):
+    """Test cases for validating uploads without reading them into memory."""
+
+    def test_sniff_image_format(self):
+        self.assertEqual(sniff_image_format(JPEG), "jpeg")
+        self.assertEqual(sniff_image_format(memoryview(PNG)), "png")
+        self.assertIsNone(sniff_image_format(b"GIF89a"))
+
+    def test_in_memory_upload(self):
+        upload = make_upload(JPEG)
+
+        with image_upload(upload) as data:
+            self.assertIsInstance(data, memoryview)
+            self.assertEqual(bytes(data), JPEG)
+
+        # the view is released, so Starlette can still close the file
+        upload.file.close()
+
+    def test_bytesio_upload_buffer_is_released(self):
+        upload = UploadFile(io.BytesIO(JPEG), size=len(JPEG), filename="img")
+
+        with image_upload(upload) as data:
+            self.assertEqual(bytes(data), JPEG)
+
+        # a still-exported buffer would make resizing the BytesIO fail
+        upload.file.write(b"more")
+        upload.file.close()
+
+    def test_spooled_to_disk_upload_is_mapped(self):
+        big = PNG + b"\x01" * 4096
+        upload = make_upload(big, spool_max_size=1024)
+        self.assertTrue(upload.file._rolled)
+
+        with image_upload(upload) as data:
+            self.assertEqual(len(data), len(big))
+            self.assertEqual(bytes(data[:8]), PNG[:8])
+
+        upload.file.close()
+
+    def test_mapped_upload_still_in_use_after_cancel(self):
+        big = PNG + b"\x01" * 4096
+        upload = make_upload(big, spool_max_size=1024)
+
+        # a decode that outlives the request keeps the mapping exported
+        with image_upload(upload) as data:
+            in_use = np.frombuffer(data, dtype=np.uint8)
+
+        self.assertEqual(in_use[:8].tobytes(), PNG[:8])
+        del in_use
+        upload.file.close()
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(HTTPException) as ctx:
+            with image_upload(make_upload(b"GIF89a not an image")):
+                pass
+        self.assertEqual(ctx.exception.status_code, 415)
+
+    def test_rejects_too_large(self):
+        with self.assertRaises(HTTPException) as ctx:
+            with image_upload(make_upload(JPEG), max_bytes=50):
+                pass
+        self.assertEqual(ctx.exception.status_code, 413)
+
+    def test_rejects_empty(self):
+        for spool_max_size in (1024, 0):
+            with self.assertRaises(HTTPException) as ctx:
+                with image_upload(make_upload(b"", spool_max_size)):
+                    pass
+            self.assertEqual(ctx.exception.status_code, 400)
+
+
+class TestDetectUploadValidation(unittest.TestCase):
+    """Test cases for upload checks on the detect endpoints."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch("app.routes.item.detect_objects_yolo")
+    def test_detect_rejects_non_image(self, mock_yolo):
+        test_image = ("notes.txt", b"hello", "image/jpeg")
+        response = self.client.post("/items/detect", files={"image": test_image})
+
+        self.assertEqual(response.status_code, 415)
+        mock_yolo.assert_not_called()
+
+    @patch("app.routes.item.detect_objects_yolo_batch")
+    def test_batch_rejects_non_image(self, mock_batch):
+        files = [
+            ("images", ("a.jpg", JPEG, "image/jpeg")),
+            ("images", ("b.gif", b"GIF89a", "image/gif")),
+        ]
+        response = self.client.post("/items/detect/batch", files=files)
+
+        self.assertEqual(response.status_code, 415)
+        mock_batch.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
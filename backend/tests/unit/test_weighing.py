@@ -0,0 +1,134 @@
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Item
+from app.state.db import items_store, trips_store, weighing_jobs_store
+
+
+class TestWeighingJobs(unittest.TestCase):
+    """Test cases for weighing as background jobs."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        items_store.clear()
+        trips_store.clear()
+        weighing_jobs_store.clear()
+
+    def tearDown(self):
+        items_store.clear()
+        trips_store.clear()
+        weighing_jobs_store.clear()
+
+    @patch("hardware.readscale.find_scales", return_value={"A1": None})
+    @patch("app.routes.item.get_weight")
+    def test_job_returns_immediately_and_long_polls(self, mock_get_weight, _):
+        items_store["i1"] = Item(item_id="i1")
+        release = threading.Event()
+
+        def slow_weight(**kwargs):
+            release.wait(5)
+            return json.dumps({"total_weight_kg": 0.8})
+
+        mock_get_weight.side_effect = slow_weight
+
+        response = self.client.post("/items/weight/jobs?item_id=i1&station=A1")
+
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertIn(job["status"], ("queued", "running"))
+        self.assertEqual(job["station"], "A1")
+
+        # still weighing: a short long-poll comes back unfinished
+        response = self.client.get(f"/items/weight/jobs/{job['job_id']}?wait=0.05")
+        self.assertIn(response.json()["status"], ("queued", "running"))
+
+        release.set()
+        response = self.client.get(f"/items/weight/jobs/{job['job_id']}?wait=5")
+
+        result = response.json()
+        self.assertEqual(result["status"], "done")
+        self.assertEqual(result["item"]["item_id"], "i1")
+        self.assertEqual(result["item"]["weight_kg"], 0.8)
+        self.assertEqual(items_store["i1"].weight_kg, 0.8)
+        mock_get_weight.assert_called_once_with(wait_time=6.0, station_id="A1")
+
+    @patch("app.routes.item.get_weight")
+    def test_failed_job_records_error(self, mock_get_weight):
+        mock_get_weight.return_value = json.dumps({"error": "Scale not detected"})
+
+        job = self.client.post("/items/weight/jobs").json()
+        result = self.client.get(f"/items/weight/jobs/{job['job_id']}?wait=5").json()
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["error"], "Scale not detected")
+        self.assertIsNone(result["item"])
+
+    def test_unknown_job(self):
+        response = self.client.get("/items/weight/jobs/missing")
+        self.assertEqual(response.status_code, 404)
+
+    @patch("app.routes.item.get_weight")
+    def test_job_pruned_while_waiting(self, mock_get_weight):
+        release = threading.Event()
+
+        def slow_weight(**kwargs):
+            release.wait(5)
+            # dropped from the store before the long poll picks it up
+            weighing_jobs_store.clear()
+            return json.dumps({"total_weight_kg": 0.1})
+
+        mock_get_weight.side_effect = slow_weight
+
+        job = self.client.post("/items/weight/jobs").json()
+        release.set()
+        response = self.client.get(f"/items/weight/jobs/{job['job_id']}?wait=5")
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch("app.weighing.WEIGHING_MAX_PENDING", 1)
+    @patch("app.routes.item.get_weight")
+    def test_too_many_pending_jobs(self, mock_get_weight):
+        release = threading.Event()
+
+        def slow_weight(**kwargs):
+            release.wait(5)
+            return json.dumps({"total_weight_kg": 0.1})
+
+        mock_get_weight.side_effect = slow_weight
+
+        first = self.client.post("/items/weight/jobs")
+        second = self.client.post("/items/weight/jobs")
+        release.set()
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 503)
+        self.assertEqual(second.headers["Retry-After"], "1")
+        self.client.get(f"/items/weight/jobs/{first.json()['job_id']}?wait=5")
+
+    @patch("app.weighing.WEIGHING_JOBS_KEPT", 2)
+    @patch("app.routes.item.get_weight")
+    def test_old_finished_jobs_are_dropped(self, mock_get_weight):
+        mock_get_weight.return_value = json.dumps({"total_weight_kg": 0.1})
+
+        job_ids = []
+        for _ in range(4):
+            job_ids.append(self.client.post("/items/weight/jobs").json()["job_id"])
+            self.client.get(f"/items/weight/jobs/{job_ids[-1]}?wait=5")
+
+        # pruned when the next job is submitted, the newest always stays
+        self.assertNotIn(job_ids[0], weighing_jobs_store)
+        self.assertIn(job_ids[-1], weighing_jobs_store)
+        self.assertEqual(len(weighing_jobs_store), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+"""Fake YOLO results and models shared by the CV tests."""
+
+from unittest.mock import MagicMock
+
+# One suitcase, 100px wide
+SUITCASE = (28, 0.9, (0, 0, 100, 50))
+
+
+def make_yolo_result(detections):
+    """Build a fake YOLO result from (class_id, confidence, xyxy) tuples."""
+    boxes = []
+    for class_id, confidence, xyxy in detections:
+        box = MagicMock()
+        box.conf.item.return_value = confidence
+        box.cls.item.return_value = class_id
+        box.xyxy.tolist.return_value = [list(xyxy)]
+        boxes.append(box)
+    result = MagicMock()
+    result.boxes = boxes
+    return result
+
+
+def make_yolo_model(detections=(SUITCASE,), names=None):
+    """Fake YOLO model that finds the same detections in every image it's given."""
+    result = make_yolo_result(detections)
+    model = MagicMock()
+    model.names = names or {28: "suitcase"}
+    model.side_effect = lambda images, **kwargs: [result for _ in images]
+    return model